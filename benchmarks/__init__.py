@@ -0,0 +1,26 @@
+import os, sys
+
+import django
+
+from django.conf import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup(database=None, **overrides):
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    settings.configure(
+        INSTALLED_APPS     = ['postings', 'products', 'users'],
+        DATABASES          = {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME'  : database or ':memory:',
+            }
+        },
+        USE_TZ             = False,
+        DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField',
+        **overrides
+    )
+    django.setup()
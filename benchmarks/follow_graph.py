@@ -0,0 +1,109 @@
+"""
+Follow lookups against the follows table versus the in-memory FollowGraph.
+
+    python -m benchmarks.follow_graph --users 20000 --edges 1000000
+
+Builds a random graph in SQLite, then times the questions the feed and
+follow views ask: followings of U, followers of U, which of 20 authors U
+follows, and U's mutual follows. The graph is warmed with one bulk load
+first, so its numbers are the steady state of a long-lived worker.
+"""
+import argparse, random, sys, time
+
+from benchmarks import setup
+
+setup()
+
+from django.db import connection
+
+from users.models       import User, Follow
+from users.follow_graph import FollowGraph
+
+
+def populate(users, edges, generator):
+    with connection.schema_editor() as editor:
+        editor.create_model(User)
+        editor.create_model(Follow)
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO users (id, kakao_id, kakao_email, fanout_on_read, follower_count, following_count) VALUES (%s, %s, %s, 0, 0, 0)',
+            [(user_id, user_id, f'{user_id}@benchmark.com') for user_id in range(1, users + 1)]
+        )
+
+        pairs = set()
+
+        while len(pairs) < edges:
+            follower_id, followed_id = generator.randint(1, users), generator.randint(1, users)
+
+            if follower_id != followed_id:
+                pairs.add((follower_id, followed_id))
+
+        cursor.executemany('INSERT INTO follows (follower_id, followed_id) VALUES (%s, %s)', list(pairs))
+
+def db_followings(user_id, author_ids):
+    return list(Follow.objects.filter(follower_id=user_id).values_list('followed_id', flat=True))
+
+def db_followers(user_id, author_ids):
+    return list(Follow.objects.filter(followed_id=user_id).values_list('follower_id', flat=True))
+
+def db_following_any(user_id, author_ids):
+    return set(Follow.objects.filter(follower_id=user_id, followed_id__in=author_ids).values_list('followed_id', flat=True))
+
+def db_mutuals(user_id, author_ids):
+    followers = Follow.objects.filter(followed_id=user_id).values('follower_id')
+
+    return list(Follow.objects.filter(follower_id=user_id, followed_id__in=followers).values_list('followed_id', flat=True))
+
+def adjacency_bytes(graph):
+    entries = [*graph.outgoing.values(), *graph.incoming.values()]
+
+    return sum(sys.getsizeof(ids) for _, ids in entries)
+
+def measure(function, samples):
+    start = time.perf_counter()
+
+    for user_id, author_ids in samples:
+        function(user_id, author_ids)
+
+    return (time.perf_counter() - start) / len(samples) * 1000000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--edges', type=int, default=1000000)
+    parser.add_argument('--samples', type=int, default=2000)
+    options = parser.parse_args()
+
+    generator = random.Random(14)
+
+    start = time.perf_counter()
+    populate(options.users, options.edges, generator)
+    print(f'populated {options.edges} edges in {time.perf_counter() - start:.1f}s')
+
+    graph = FollowGraph()
+
+    start = time.perf_counter()
+    graph.followings_many(range(1, options.users + 1))
+    graph.followers_many(range(1, options.users + 1))
+    print(f'graph loaded in {time.perf_counter() - start:.1f}s, {adjacency_bytes(graph) / 1024 / 1024:.1f} MiB of adjacency arrays')
+
+    samples = [
+        (generator.randint(1, options.users), [generator.randint(1, options.users) for _ in range(20)])
+        for _ in range(options.samples)
+    ]
+
+    for name, db, in_memory in [
+        ('followings', db_followings, lambda user_id, author_ids: graph.followings(user_id)),
+        ('followers', db_followers, lambda user_id, author_ids: graph.followers(user_id)),
+        ('following_any(20)', db_following_any, graph.following_any),
+        ('mutuals', db_mutuals, lambda user_id, author_ids: graph.mutuals(user_id)),
+    ]:
+        for user_id, author_ids in samples[:50]:
+            assert sorted(db(user_id, author_ids)) == sorted(in_memory(user_id, author_ids))
+
+        print(f'{name:18}: db {measure(db, samples):9.1f} us   graph {measure(in_memory, samples):7.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Posting image derivatives: bytes served per variant and render throughput.
+
+    python -m benchmarks.image_variants --images 16 --workers 0 2 4
+
+Writes phone-camera sized JPEGs (4032x3024, noisy so they compress like
+photos), then renders POSTING_IMAGE_VARIANTS with postings.images.render
+inline and through process pools of each size. Reports the size of every
+variant against the original and images rendered per second.
+"""
+import argparse, os, random, shutil, statistics, tempfile, time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks import setup
+
+setup(POSTING_IMAGE_VARIANTS={
+    'thumbnail' : {'width' : 320,  'quality' : 70, 'crop' : True},
+    'feed'      : {'width' : 1080, 'quality' : 80},
+    'full'      : {'width' : 2048, 'quality' : 85},
+})
+
+from django.conf import settings
+from PIL         import Image, ImageFilter
+
+from postings.images import render, remove
+
+
+def photo(path, generator):
+    noise = Image.effect_noise((1008, 756), 64).filter(ImageFilter.GaussianBlur(1))
+    tint  = Image.new('RGB', noise.size, tuple(generator.randint(60, 200) for _ in range(3)))
+    image = Image.blend(tint, noise.convert('RGB'), 0.35).resize((4032, 3024), Image.BICUBIC)
+
+    image.save(path, 'JPEG', quality=92)
+
+def run(sources, directory, workers):
+    variants = settings.POSTING_IMAGE_VARIANTS
+    start    = time.perf_counter()
+
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render, sources, [variants] * len(sources), [directory] * len(sources)))
+    else:
+        results = [render(source, variants, directory) for source in sources]
+
+    elapsed = time.perf_counter() - start
+
+    return results, len(sources) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2, 4])
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    generator = random.Random(25)
+    sources   = [os.path.join(directory, f'original{i}.jpg') for i in range(options.images)]
+
+    try:
+        for source in sources:
+            photo(source, generator)
+
+        original = statistics.mean(os.path.getsize(source) for source in sources)
+        print(f'{"original":10} {original / 1024:8.0f} KiB')
+
+        for workers in options.workers:
+            results, rate = run(sources, directory, workers)
+
+            if workers == options.workers[0]:
+                for name in settings.POSTING_IMAGE_VARIANTS:
+                    size = statistics.mean(os.path.getsize(paths[name]) for paths in results)
+                    print(f'{name:10} {size / 1024:8.0f} KiB  {size / original:6.1%} of original')
+
+            print(f'workers {workers}: {rate:6.1f} images/s')
+
+            for paths in results:
+                remove(paths)
+
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Sign-in throughput against a local Kakao stub, healthy and slow.
+
+    python -m benchmarks.kakao_signin --workers 8 --duration 5 --slow-delay 3
+
+"before" calls requests.get without a session or timeout, as
+SocialSignInView used to; "after" goes through KakaoClient. A sign-in
+counts as handled once the worker gets an answer, including a fast
+KAKAO_UNAVAILABLE from the timeout or the open circuit.
+"""
+import argparse, json, statistics, threading, time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks import setup
+
+setup()
+
+import requests
+
+from users.kakao import KakaoClient, CircuitBreaker, KakaoUnavailable
+
+
+class KakaoStub(BaseHTTPRequestHandler):
+    protocol_version        = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    delay                   = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+
+        body = json.dumps({'id': 1, 'kakao_account': {'email': 'benchmark@test.com'}}).encode()
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        except ConnectionError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def before(base_url):
+    def sign_in(token):
+        return requests.get(base_url + '/v2/user/me', headers={'Authorization' : f'Bearer {token}'}).json()
+
+    return sign_in
+
+def after(base_url):
+    client = KakaoClient(
+        base_url        = base_url,
+        connect_timeout = 1.0,
+        read_timeout    = 0.5,
+        pool_size       = 20,
+        breaker         = CircuitBreaker(5, 30),
+    )
+
+    def sign_in(token):
+        try:
+            return client.get_user_info(token)
+
+        except KakaoUnavailable:
+            return None
+
+    return sign_in
+
+def run(sign_in, workers, duration):
+    latencies = []
+    failures  = []
+    lock      = threading.Lock()
+    deadline  = time.monotonic() + duration
+
+    def worker(number):
+        count = 0
+
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            info    = sign_in(f'token-{number}-{count}')
+
+            with lock:
+                latencies.append(time.monotonic() - started)
+
+                if info is None:
+                    failures.append(number)
+
+            count += 1
+
+    threads = [threading.Thread(target=worker, args=(number,), daemon=True) for number in range(workers)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+
+    return {
+        'throughput': len(latencies) / duration,
+        'failed'    : len(failures),
+        'p50_ms'    : statistics.median(latencies) * 1000,
+        'p99_ms'    : latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--slow-delay', type=float, default=3)
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KakaoStub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    for label, delay in [('healthy upstream', 0), (f'upstream delayed {options.slow_delay}s', options.slow_delay)]:
+        KakaoStub.delay = delay
+
+        print(label)
+
+        for name, factory in [('before', before), ('after', after)]:
+            result = run(factory(base_url), options.workers, options.duration)
+            print(f'  {name:6}: {result["throughput"]:8.1f} sign-ins/s  p50 {result["p50_ms"]:8.1f} ms  p99 {result["p99_ms"]:8.1f} ms  unavailable {result["failed"]}')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Product search latency: LIKE '%q%' scan versus the n-gram token index.
+
+    python -m benchmarks.product_search --products 1000000
+
+Fills SQLite with generated Korean product names, writes their tokens
+with products.search.tokenize, then times products.search.search and an
+icontains scan ranked the same way (shortest name first, first page of 20).
+"""
+import argparse, random, statistics, time
+
+from benchmarks import setup
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--products', type=int, default=1000000)
+parser.add_argument('--runs', type=int, default=5)
+parser.add_argument('--queries', nargs='+')
+options = parser.parse_args()
+
+setup(PRODUCT_SEARCH_BATCH_SIZE=1000, PRODUCT_SEARCH_FREQUENCY_CAP=10000)
+
+from django.db                  import connection
+from django.db.models.functions import Length
+
+from products.models import Product, ProductToken
+from products.search import search, tokenize
+
+ADJECTIVES = [
+    '원목', '화이트', '블랙', '오크', '월넛', '모던', '빈티지', '북유럽', '라탄', '패브릭',
+    '가죽', '철제', '접이식', '높은', '낮은', '미니', '대형', '코너', '슬림', '아이보리',
+    '그레이', '베이지', '네이비', '원형', '사각', '이동식', '벽걸이', '스탠드', '무드', '호텔식',
+]
+NOUNS = [
+    '의자', '소파', '침대', '책상', '식탁', '선반', '조명', '러그', '커튼', '수납장',
+    '옷장', '서랍장', '거울', '협탁', '벤치', '스툴', '화장대', '책장', '행거', '매트리스',
+    '쿠션', '이불', '베개', '장식장', '테이블', '캐비닛', '수납함', '액자', '시계', '화분',
+]
+QUERIES = ['의자', '원목 의자', '북유럽 소파', '화이트', '수납', '침대 2', '블랙 스툴 15', '장']
+
+
+def populate(count, generator):
+    with connection.schema_editor() as editor:
+        editor.create_model(Product)
+        editor.create_model(ProductToken)
+
+    with connection.cursor() as cursor:
+        for start in range(1, count + 1, 50000):
+            names = [
+                (product_id, f'{generator.choice(ADJECTIVES)} {generator.choice(NOUNS)} {generator.randint(1, 999)}')
+                for product_id in range(start, min(start + 50000, count + 1))
+            ]
+
+            cursor.executemany(
+                "INSERT INTO products (id, product_name, price, thumbnail_url, cache_version) VALUES (%s, %s, 10000, '', 1)",
+                names
+            )
+            cursor.executemany(
+                'INSERT INTO product_tokens (token, product_id, name_length) VALUES (%s, %s, %s)',
+                [(token, product_id, len(name)) for product_id, name in names for token in tokenize(name)]
+            )
+
+def measure(function, query, runs):
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(query)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings), max(timings)
+
+def scan(query):
+    products = Product.objects.all()
+
+    for word in query.split():
+        products = products.filter(product_name__icontains=word)
+
+    return list(products.order_by(Length('product_name'), 'id')[:21])
+
+def main():
+    start = time.perf_counter()
+    populate(options.products, random.Random(22))
+    print(f'populated {options.products} products in {time.perf_counter() - start:.1f}s')
+
+    for query in options.queries or QUERIES:
+        index_p50, index_max = measure(lambda query: search(query, 20), query, options.runs)
+        scan_p50, _          = measure(scan, query, 1)
+        hits                 = len(search(query, 20)[0])
+
+        print(f'{query:12}  index p50 {index_p50:7.1f} ms  max {index_max:7.1f} ms   LIKE scan {scan_p50:8.1f} ms   ({hits} on first page)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Buyers racing for the last units of one product option.
+
+    python -m benchmarks.stock_reservation --threads 16 --stock 2000
+
+Every thread buys one unit at a time until the option is sold out. The
+conditional path is products.stock.reserve inside a transaction, as the
+purchase view runs it. The read-modify-write path is the naive
+get / stock -= 1 / save it replaces. Reports units sold against the
+starting stock and purchases per second. SQLite serialises writers, so
+the throughput is a floor for a row-locking database.
+"""
+import argparse, os, statistics, tempfile, threading, time
+
+from benchmarks import setup
+
+DATABASE = os.path.join(tempfile.mkdtemp(), 'stock.sqlite3')
+
+setup(DATABASE, PRODUCT_CACHE='default', PRODUCT_CACHE_VERSION_TTL=300)
+
+from django.db import connection, transaction, OperationalError
+
+from products.models import Product, ProductOption, Color
+from products.stock  import reserve, OutOfStock
+
+
+def populate():
+    with connection.schema_editor() as editor:
+        editor.create_model(Product)
+        editor.create_model(Color)
+        editor.create_model(ProductOption)
+
+    Color.objects.create(id=1, name='black')
+    Product.objects.bulk_create([Product(id=1, product_name='chair', price=1000, thumbnail_url='')])
+    ProductOption.objects.bulk_create([ProductOption(id=1, product_id=1, color_id=1)])
+
+def conditional(option):
+    try:
+        with transaction.atomic():
+            reserve(option, 1)
+
+        return True
+
+    except OutOfStock:
+        return False
+
+def read_modify_write(option):
+    option = ProductOption.objects.get(id=option.id)
+
+    if option.stock < 1:
+        return False
+
+    option.stock -= 1
+    option.save(update_fields=['stock'])
+
+    return True
+
+def buyer(purchase, option, barrier, sold, latencies):
+    barrier.wait()
+
+    try:
+        while True:
+            start = time.perf_counter()
+
+            try:
+                bought = purchase(option)
+
+            except OperationalError:
+                continue
+
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            if not bought:
+                return
+
+            sold.append(1)
+
+    finally:
+        connection.close()
+
+def run(purchase, threads, stock):
+    ProductOption.objects.filter(id=1).update(stock=stock)
+    option = ProductOption.objects.get(id=1)
+
+    sold      = []
+    latencies = []
+    barrier   = threading.Barrier(threads + 1)
+    workers   = [threading.Thread(target=buyer, args=(purchase, option, barrier, sold, latencies)) for _ in range(threads)]
+
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+
+    for worker in workers:
+        worker.join()
+
+    elapsed = time.perf_counter() - start
+    left    = ProductOption.objects.get(id=1).stock
+
+    print(
+        f'{purchase.__name__:18}  sold {len(sold):6} of {stock}  stock left {left:5}  oversold {max(len(sold) - stock, 0):6}'
+        f'  {len(sold) / elapsed:7.0f} purchases/s  p50 {statistics.median(latencies):6.2f} ms'
+        f'  p99 {statistics.quantiles(latencies, n=100)[98]:6.2f} ms'
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--stock', type=int, default=2000)
+    options = parser.parse_args()
+
+    populate()
+
+    for purchase in [conditional, read_modify_write]:
+        run(purchase, options.threads, options.stock)
+
+
+if __name__ == '__main__':
+    main()
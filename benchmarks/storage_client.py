@@ -0,0 +1,70 @@
+"""
+Per-upload overhead of the S3 storage client.
+
+    python -m benchmarks.storage_client --uploads 200
+
+"before" builds a boto3 client for every upload like PostingView.post used
+to, "after" reuses the process-wide S3Storage client. Requests are answered
+by botocore's Stubber, so the numbers cover client setup and request
+signing only; TLS and connection reuse savings on a real network come on top.
+"""
+import argparse, io, time
+
+from benchmarks import setup
+
+setup(
+    AWS_S3_ACCESS_KEY_ID        = 'benchmark',
+    AWS_S3_SECRET_ACCESS_KEY    = 'benchmark',
+    AWS_STORAGE_BUCKET_NAME     = 'benchmark',
+    AWS_S3_MAX_POOL_CONNECTIONS = 20,
+    AWS_S3_MULTIPART_THRESHOLD  = 8 * 1024 * 1024,
+    AWS_S3_MULTIPART_CHUNKSIZE  = 8 * 1024 * 1024,
+    AWS_S3_MAX_CONCURRENCY      = 4,
+)
+
+import boto3
+
+from botocore.stub import Stubber
+
+from postings.storage import S3Storage
+
+PAYLOAD = b'x' * 64 * 1024
+
+
+def upload(client):
+    with Stubber(client) as stubber:
+        stubber.add_response('put_object', {})
+        client.upload_fileobj(io.BytesIO(PAYLOAD), 'benchmark', 'key', Config=S3Storage.get_transfer_config())
+
+def before():
+    upload(boto3.client('s3', region_name='ap-northeast-2', aws_access_key_id='benchmark', aws_secret_access_key='benchmark'))
+
+def after():
+    upload(S3Storage.get_client())
+
+def measure(function, uploads):
+    start = time.perf_counter()
+
+    for _ in range(uploads):
+        function()
+
+    return (time.perf_counter() - start) / uploads * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--uploads', type=int, default=200)
+    uploads = parser.parse_args().uploads
+
+    after()
+
+    before_ms = measure(before, uploads)
+    after_ms  = measure(after, uploads)
+
+    print(f'uploads          : {uploads}')
+    print(f'client per upload: {before_ms:.2f} ms/upload')
+    print(f'pooled client    : {after_ms:.2f} ms/upload')
+    print(f'speedup          : {before_ms / after_ms:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
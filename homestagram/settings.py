@@ -166,6 +166,131 @@ AWS_STORAGE_BUCKET_NAME  = AWS_STORAGE_BUCKET_NAME
 
 S3_URL = S3_URL
 
+AWS_S3_MAX_POOL_CONNECTIONS = 20
+AWS_S3_MULTIPART_THRESHOLD  = 8 * 1024 * 1024
+AWS_S3_MULTIPART_CHUNKSIZE  = 8 * 1024 * 1024
+AWS_S3_MAX_CONCURRENCY      = 4
+
+POSTING_STORAGE_BACKEND  = 'postings.storage.S3Storage'
+LOCAL_STORAGE_ROOT       = BASE_DIR / 'media'
+LOCAL_STORAGE_URL        = '/media/'
+POSTING_UPLOAD_WORKERS   = 4
+POSTING_UPLOAD_SPOOL_DIR = None
+POSTING_PENDING_TIMEOUT  = 30
+
+POSTING_IMAGE_WORKERS  = 2
+POSTING_IMAGE_VARIANTS = {
+    'thumbnail' : {'width' : 320,  'quality' : 70, 'crop' : True},
+    'feed'      : {'width' : 1080, 'quality' : 80},
+    'full'      : {'width' : 2048, 'quality' : 85},
+}
+
+##FEED
+FEED_PAGE_SIZE     = 5
+FEED_MAX_PAGE_SIZE = 50
+
+FEED_COMMENT_PREVIEW_SIZE = 3
+COMMENT_PAGE_SIZE         = 20
+
+STREAMING_CHUNK_SIZE = 500
+
+BATCH_MUTATION_MAX_IDS = 500
+
+PURCHASE_HISTORY_PAGE_SIZE = 20
+PURCHASE_INGEST_BATCH_SIZE = 5000
+
+##CACHE
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND' : 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'posting-fragments',
+        'TIMEOUT' : 60 * 60,
+        'OPTIONS' : {
+            'MAX_ENTRIES'   : 10000,
+            'CULL_FREQUENCY': 3,
+        },
+    },
+    'users': {
+        'BACKEND' : 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'signed-in-users',
+        'OPTIONS' : {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+    'products': {
+        'BACKEND' : 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'product-details',
+        'TIMEOUT' : 60 * 60,
+        'OPTIONS' : {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+POSTING_FRAGMENT_CACHE    = 'fragments'
+USER_CACHE                = 'users'
+USER_CACHE_TTL            = 60 * 5
+PRODUCT_CACHE             = 'products'
+PRODUCT_CACHE_VERSION_TTL = 5
+PRODUCT_STOCK_TTL         = 5
+
+##KAKAO
+KAKAO_API_URL           = 'https://kapi.kakao.com'
+KAKAO_CONNECT_TIMEOUT   = 1.0
+KAKAO_READ_TIMEOUT      = 2.0
+KAKAO_POOL_SIZE         = 20
+KAKAO_BREAKER_THRESHOLD = 5
+KAKAO_BREAKER_RESET     = 30
+KAKAO_TOKEN_CACHE       = 'default'
+KAKAO_TOKEN_CACHE_TTL   = 60
+
+##TIMELINE
+TIMELINE_FANOUT_LIMIT  = 5000
+TIMELINE_BACKFILL_SIZE = 200
+TIMELINE_BATCH_SIZE    = 1000
+
+##USERS
+NICKNAME_CHECK_MAX_NAMES = 20
+
+FOLLOW_GRAPH_ENABLED = False
+FOLLOW_GRAPH_MAX_AGE = 30
+
+RECOMMENDATION_SIZE            = 20
+RECOMMENDATION_BATCH_SIZE      = 500
+RECOMMENDATION_MAX_AGE         = 60 * 60 * 24
+RECOMMENDATION_FOLLOW_WEIGHT   = 2
+RECOMMENDATION_BOOKMARK_WEIGHT = 1
+
+##TRENDING
+TRENDING_WINDOWS = {
+    'day'  : 60 * 60 * 6,
+    'week' : 60 * 60 * 24 * 2,
+}
+TRENDING_WEIGHTS = {
+    'tag'      : 1,
+    'bookmark' : 2,
+    'purchase' : 5,
+}
+TRENDING_SIZE              = 20
+TRENDING_BATCH_SIZE        = 1000
+TRENDING_HORIZON           = 20
+TRENDING_RENORMALIZE_AFTER = 64
+
+##PRODUCTS
+PRODUCT_LOOKUP_MAX_IDS = 100
+
+##SEARCH
+PRODUCT_SEARCH_PAGE_SIZE  = 20
+PRODUCT_SEARCH_BATCH_SIZE = 1000
+
+PRODUCT_SEARCH_FREQUENCY_CAP = 10000
+
+PRODUCT_SEARCH_MAX_QUERY_LENGTH = 50
+PRODUCT_SEARCH_MAX_TERMS        = 10
+
 LOGGING = {
     'disable_existing_loggers': False,
     'version': 1,
@@ -0,0 +1,63 @@
+import threading
+
+
+class CacheStats:
+    def __init__(self, name):
+        self.name   = name
+        self.hits   = 0
+        self.misses = 0
+        self._lock  = threading.Lock()
+
+    def hit(self, count=1):
+        with self._lock:
+            self.hits += count
+
+        _notify(self, 'hit', count)
+
+    def miss(self, count=1):
+        with self._lock:
+            self.misses += count
+
+        _notify(self, 'miss', count)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+
+        return self.hits / total if total else 0.0
+
+    def snapshot(self):
+        return {
+            'hits'    : self.hits,
+            'misses'  : self.misses,
+            'hit_rate': self.hit_rate
+        }
+
+    def reset(self):
+        with self._lock:
+            self.hits   = 0
+            self.misses = 0
+
+
+_registry      = {}
+_registry_lock = threading.Lock()
+_hooks         = []
+
+
+def _notify(stats, event, count):
+    for hook in _hooks:
+        hook(stats, event, count)
+
+def add_hook(hook):
+    _hooks.append(hook)
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def cache_stats(name):
+    with _registry_lock:
+        return _registry.setdefault(name, CacheStats(name))
+
+def export():
+    return {name : stats.snapshot() for name, stats in _registry.items()}
@@ -0,0 +1,74 @@
+import operator
+
+from collections import defaultdict
+from functools   import reduce
+
+from django.conf       import settings
+from django.core.cache import caches
+from django.db.models  import F, Q, OuterRef, Subquery
+
+from metrics              import cache_stats
+from postings.models      import Posting, Comment
+from postings.serializers import serialize_posting
+
+stats = cache_stats('posting_fragments')
+
+
+def fragment_key(posting_id, version):
+    return f'posting:{posting_id}:v{version}'
+
+def bump_version(**filters):
+    Posting.objects.filter(**filters).update(cache_version=F('cache_version') + 1)
+
+def comment_previews(posting_ids, size):
+    # The cutoff is looked up once per posting, so the comment query below only
+    # range-scans the newest `size` rows of each posting on its index.
+    cutoff  = Comment.objects.filter(posting_id=OuterRef('id')).order_by('-created_at', '-id')[size - 1:size]
+    cutoffs = Posting.objects.filter(id__in=posting_ids).\
+              annotate(cutoff_at=Subquery(cutoff.values('created_at')), cutoff_id=Subquery(cutoff.values('id'))).\
+              values_list('id', 'cutoff_at', 'cutoff_id')
+    bounds  = [
+        Q(posting_id=posting_id) if cutoff_id is None else
+        Q(posting_id=posting_id, created_at__gt=cutoff_at) | Q(posting_id=posting_id, created_at=cutoff_at, id__gte=cutoff_id)
+        for posting_id, cutoff_at, cutoff_id in cutoffs
+    ]
+    previews = defaultdict(list)
+
+    if bounds:
+        for comment in Comment.objects.select_related('user').filter(reduce(operator.or_, bounds)).order_by('-created_at', '-id'):
+            previews[comment.posting_id].append(comment)
+
+    return previews
+
+def get_fragments(postings):
+    cache     = caches[settings.POSTING_FRAGMENT_CACHE]
+    keys      = [fragment_key(posting.id, posting.cache_version) for posting in postings]
+    fragments = cache.get_many(keys)
+    missing   = [posting.id for posting, key in zip(postings, keys) if key not in fragments]
+
+    stats.hit(len(fragments))
+
+    if missing:
+        stats.miss(len(missing))
+
+        previews = comment_previews(missing, settings.FEED_COMMENT_PREVIEW_SIZE)
+        built    = {}
+
+        for posting in Posting.objects.select_related('user').prefetch_related('tag_set', 'tag_set__product').filter(id__in=missing):
+            posting.comment_preview = previews[posting.id]
+            built[posting.id]       = (fragment_key(posting.id, posting.cache_version), serialize_posting(posting))
+
+        cache.set_many(dict(built.values()))
+        fragments.update({key : built[posting.id][1] for posting, key in zip(postings, keys) if posting.id in built})
+
+    feed = []
+
+    for posting, key in zip(postings, keys):
+        if key in fragments:
+            feed.append(dict(
+                fragments[key],
+                commentCount  = posting.comment_count,
+                bookmarkCount = posting.bookmark_count
+            ))
+
+    return feed
@@ -0,0 +1,109 @@
+import os, logging, math, multiprocessing, tempfile, threading
+
+from concurrent.futures         import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+ORIENTATION = 0x0112
+
+_pool      = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers = settings.POSTING_IMAGE_WORKERS,
+                mp_context  = multiprocessing.get_context('forkserver')
+            )
+
+        return _pool
+
+def discard_pool(pool):
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+
+    pool.shutdown(wait=False)
+
+def resize(image, variant):
+    width = variant['width']
+
+    if variant.get('crop'):
+        side = min(width, image.width, image.height)
+
+        return ImageOps.fit(image, (side, side), Image.LANCZOS)
+
+    resized = image.copy()
+    resized.thumbnail((width, image.height), Image.LANCZOS)
+
+    return resized
+
+def render(source, variants, directory):
+    paths = {}
+
+    try:
+        with Image.open(source) as image:
+            displayed = image.height if image.getexif().get(ORIENTATION, 1) > 4 else image.width
+            shortest  = min(image.width, image.height)
+
+            # Square crops need their width on the shorter side, so a wide
+            # panorama is never drafted below the thumbnail height.
+            scale = max(variant['width'] / (shortest if variant.get('crop') else displayed) for variant in variants.values())
+
+            image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+
+            image = ImageOps.exif_transpose(image).convert('RGB')
+
+            for name, variant in variants.items():
+                descriptor, paths[name] = tempfile.mkstemp(dir=directory, suffix=f'.{name}.jpg')
+                os.close(descriptor)
+
+                resize(image, variant).save(paths[name], 'JPEG', quality=variant['quality'], optimize=True, progressive=True)
+
+    except Exception:
+        remove(paths)
+        raise
+
+    return paths
+
+def remove(paths):
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+def derive(source):
+    variants  = settings.POSTING_IMAGE_VARIANTS
+    directory = settings.POSTING_UPLOAD_SPOOL_DIR
+
+    try:
+        if not settings.POSTING_IMAGE_WORKERS:
+            return render(source, variants, directory)
+
+        pool = get_pool()
+
+        try:
+            return pool.submit(render, source, variants, directory).result()
+
+        except BrokenProcessPool:
+            logger.exception('Image worker pool broke, rendering %s inline', source)
+            discard_pool(pool)
+
+            return render(source, variants, directory)
+
+    except (OSError, Image.DecompressionBombError):
+        logger.warning('Could not decode %s, publishing the original only', source, exc_info=True)
+        return {}
+
+def variant_key(key, name):
+    return f'{os.path.splitext(key)[0]}.{name}.jpg'
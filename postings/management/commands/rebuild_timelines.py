@@ -0,0 +1,33 @@
+from django.conf                 import settings
+from django.core.management.base import BaseCommand
+from django.db                   import transaction
+
+from postings.timeline import rebuild
+from users.models      import User
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized home timelines from follows and postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', nargs='+', type=int, help='Only rebuild timelines of these user ids')
+        parser.add_argument('--batch-size', type=int, default=settings.TIMELINE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        User.objects.filter(follower_count__gt=settings.TIMELINE_FANOUT_LIMIT).update(fanout_on_read=True)
+        User.objects.filter(follower_count__lte=settings.TIMELINE_FANOUT_LIMIT).update(fanout_on_read=False)
+
+        user_ids = User.objects.order_by('id').values_list('id', flat=True)
+
+        if options['users']:
+            user_ids = user_ids.filter(id__in=options['users'])
+
+        rebuilt = 0
+
+        for user_id in user_ids.iterator(chunk_size=options['batch_size']):
+            with transaction.atomic():
+                rebuild(user_id)
+
+            rebuilt += 1
+
+        self.stdout.write(f'Rebuilt {rebuilt} timelines')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models            import Count, F, OuterRef, Subquery
+from django.db.models.functions  import Coalesce
+
+from postings.models import Posting, Comment
+from users.models    import User, Bookmark, Follow
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized comment, bookmark and follow counters in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def count_of(self, model, field):
+        counts = model.objects.filter(**{field : OuterRef('id')}).order_by().values(field).annotate(count=Count('id')).values('count')
+
+        return Coalesce(Subquery(counts), 0)
+
+    def reconcile(self, model, counters, batch_size):
+        fixed   = 0
+        last_id = 0
+
+        while True:
+            ids = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+
+            if not ids:
+                return fixed
+
+            totals = {counter : self.count_of(source, field) for counter, (source, field) in counters.items()}
+            fixed += model.objects.filter(id__gt=last_id, id__lte=ids[-1]).\
+                     annotate(**{f'actual_{counter}' : total for counter, total in totals.items()}).\
+                     exclude(**{counter : F(f'actual_{counter}') for counter in counters}).\
+                     update(**totals)
+
+            last_id = ids[-1]
+
+    def handle(self, *args, **options):
+        postings = self.reconcile(Posting, {
+            'comment_count' : (Comment, 'posting_id'),
+            'bookmark_count': (Bookmark, 'posting_id'),
+        }, options['batch_size'])
+
+        users = self.reconcile(User, {
+            'follower_count' : (Follow, 'followed_id'),
+            'following_count': (Follow, 'follower_id'),
+        }, options['batch_size'])
+
+        self.stdout.write(f'Reconciled {postings} postings and {users} users')
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf                 import settings
+from django.core.management.base import BaseCommand
+from django.utils                import timezone
+
+from postings.models import Posting
+
+
+class Command(BaseCommand):
+    help = 'Delete postings whose upload never finished, e.g. because the worker died'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.POSTING_PENDING_TIMEOUT, help='Minutes a posting may stay pending')
+
+    def handle(self, *args, **options):
+        cutoff     = timezone.now() - timedelta(minutes=options['older_than'])
+        deleted, _ = Posting.objects.filter(status=Posting.Status.PENDING, created_at__lt=cutoff).delete()
+
+        self.stdout.write(f'Swept {deleted} pending postings')
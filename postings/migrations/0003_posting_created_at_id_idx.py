@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['created_at', 'id'], name='postings_created_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_fanout_on_read'),
+        ('postings', '0003_posting_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'timelines',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='postings_user_created_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='timeline',
+            name='posting',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='postings.posting'),
+        ),
+        migrations.AddField(
+            model_name='timeline',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.user'),
+        ),
+        migrations.AddIndex(
+            model_name='timeline',
+            index=models.Index(fields=['user', 'created_at', 'posting'], name='timelines_user_created_at_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timeline',
+            unique_together={('user', 'posting')},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0004_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posting',
+            name='cache_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
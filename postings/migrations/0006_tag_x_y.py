@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0005_posting_cache_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='x',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='y',
+            field=models.IntegerField(null=True),
+        ),
+    ]
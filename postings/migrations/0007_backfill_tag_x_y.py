@@ -0,0 +1,53 @@
+import logging
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def parse_coordinate(coordinate):
+    x, y = coordinate.strip().lstrip('(').rstrip(')').split(',')
+
+    return int(x), int(y)
+
+def backfill_tag_x_y(apps, schema_editor):
+    Tag     = apps.get_model('postings', 'Tag')
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            tags = list(
+                Tag.objects.filter(id__gt=last_id, x__isnull=True).order_by('id').only('id', 'coordinate')[:BATCH_SIZE]
+            )
+
+            if not tags:
+                break
+
+            parsed = []
+
+            for tag in tags:
+                try:
+                    tag.x, tag.y = parse_coordinate(tag.coordinate)
+                    parsed.append(tag)
+
+                except (AttributeError, ValueError):
+                    logger.warning('Skipping tag %s with unparsable coordinate %r', tag.id, tag.coordinate)
+
+            Tag.objects.bulk_update(parsed, ['x', 'y'])
+
+        last_id = tags[-1].id
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('postings', '0006_tag_x_y'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_tag_x_y, migrations.RunPython.noop),
+    ]
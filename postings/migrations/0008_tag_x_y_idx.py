@@ -0,0 +1,22 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0007_backfill_tag_x_y'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='coordinate',
+            field=models.CharField(max_length=25, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['x', 'y'], name='tags_x_y_idx'),
+        ),
+    ]
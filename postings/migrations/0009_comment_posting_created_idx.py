@@ -0,0 +1,17 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0008_tag_x_y_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['posting', 'created_at', 'id'], name='comments_posting_created_idx'),
+        ),
+    ]
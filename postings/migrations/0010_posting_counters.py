@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0009_comment_posting_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posting',
+            name='bookmark_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='posting',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0010_posting_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='posting',
+            name='postings_created_at_id_idx',
+        ),
+        migrations.AddField(
+            model_name='posting',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready')], default='ready', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='posting',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='postings_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0011_posting_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posting',
+            name='feed_image_url',
+            field=models.URLField(blank=True, default='', max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='posting',
+            name='full_image_url',
+            field=models.URLField(blank=True, default='', max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='posting',
+            name='thumbnail_image_url',
+            field=models.URLField(blank=True, default='', max_length=1000),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db                  import migrations, transaction
+from django.db.models           import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(model.objects.filter(**{field : OuterRef('id')}).order_by().values(field).annotate(count=Count('id')).values('count')), 0)
+
+def backfill_posting_counters(apps, schema_editor):
+    Posting  = apps.get_model('postings', 'Posting')
+    Comment  = apps.get_model('postings', 'Comment')
+    Bookmark = apps.get_model('users', 'Bookmark')
+    last_id  = 0
+
+    while True:
+        ids = list(Posting.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+
+        if not ids:
+            break
+
+        with transaction.atomic():
+            Posting.objects.filter(id__gt=last_id, id__lte=ids[-1]).update(
+                comment_count  = count_of(Comment, 'posting_id'),
+                bookmark_count = count_of(Bookmark, 'posting_id')
+            )
+
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('postings', '0012_posting_image_variants'),
+        ('users', '0011_bookmark_follow_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_posting_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+from django.conf      import settings
+from django.db        import migrations, transaction
+from django.db.models import Q
+
+BATCH_SIZE = 1000
+
+
+def backfill_timelines(apps, schema_editor):
+    User     = apps.get_model('users', 'User')
+    Follow   = apps.get_model('users', 'Follow')
+    Posting  = apps.get_model('postings', 'Posting')
+    Timeline = apps.get_model('postings', 'Timeline')
+    last_id  = 0
+
+    User.objects.filter(follower_count__gt=settings.TIMELINE_FANOUT_LIMIT).update(fanout_on_read=True)
+    User.objects.filter(follower_count__lte=settings.TIMELINE_FANOUT_LIMIT).update(fanout_on_read=False)
+
+    while True:
+        ids = list(User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+
+        if not ids:
+            break
+
+        with transaction.atomic():
+            for user_id in ids:
+                followed_ids = Follow.objects.filter(follower_id=user_id, followed__fanout_on_read=False).values('followed_id')
+                postings     = (
+                    Posting.objects.filter(Q(user_id__in=followed_ids) | Q(user_id=user_id), status='ready')
+                        .order_by('-created_at', '-id')
+                        .values_list('id', 'created_at')[:settings.TIMELINE_BACKFILL_SIZE]
+                )
+
+                Timeline.objects.bulk_create([
+                    Timeline(user_id=user_id, posting_id=posting_id, created_at=created_at) for posting_id, created_at in postings
+                ], ignore_conflicts=True)
+
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('postings', '0013_backfill_posting_counters'),
+        ('users', '0017_backfill_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
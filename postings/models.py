@@ -1,6 +1,10 @@
 from django.db import models
 
 class Posting(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        READY   = 'ready'
+
     content     = models.TextField(max_length=500, null=True)
     user        = models.ForeignKey('users.user', on_delete=models.SET_NULL, null=True)
     image_url   = models.URLField(max_length=1000)
@@ -8,16 +12,34 @@ class Posting(models.Model):
     updated_at  = models.DateTimeField(auto_now=True)
     design_type = models.ForeignKey('designtype', on_delete=models.SET_DEFAULT, default=1)
 
+    status         = models.CharField(max_length=10, choices=Status.choices, default=Status.READY)
+    cache_version  = models.PositiveIntegerField(default=1)
+    comment_count  = models.PositiveIntegerField(default=0)
+    bookmark_count = models.PositiveIntegerField(default=0)
+
+    thumbnail_image_url = models.URLField(max_length=1000, blank=True, default='')
+    feed_image_url      = models.URLField(max_length=1000, blank=True, default='')
+    full_image_url      = models.URLField(max_length=1000, blank=True, default='')
+
     class Meta:
         db_table = 'postings'
+        indexes  = [
+            models.Index(fields=['status', 'created_at', 'id'], name='postings_status_created_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='postings_user_created_at_idx'),
+        ]
 
 class Tag(models.Model):
     posting    = models.ForeignKey('posting', on_delete=models.CASCADE)
     product    = models.ForeignKey('products.product', on_delete=models.CASCADE)
-    coordinate = models.CharField(max_length=25)
+    coordinate = models.CharField(max_length=25, null=True)
+    x          = models.IntegerField(null=True)
+    y          = models.IntegerField(null=True)
 
     class Meta:
         db_table = 'tags'
+        indexes  = [
+            models.Index(fields=['x', 'y'], name='tags_x_y_idx'),
+        ]
 
 class Comment(models.Model):
     posting    = models.ForeignKey('posting', on_delete=models.CASCADE)
@@ -28,6 +50,21 @@ class Comment(models.Model):
 
     class Meta:
         db_table = 'comments'
+        indexes  = [
+            models.Index(fields=['posting', 'created_at', 'id'], name='comments_posting_created_idx'),
+        ]
+
+class Timeline(models.Model):
+    user       = models.ForeignKey('users.user', on_delete=models.CASCADE)
+    posting    = models.ForeignKey('posting', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table        = 'timelines'
+        unique_together = ('user', 'posting')
+        indexes         = [
+            models.Index(fields=['user', 'created_at', 'posting'], name='timelines_user_created_at_idx'),
+        ]
 
 class DesignType(models.Model):
     name = models.CharField(max_length=20)
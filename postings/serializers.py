@@ -0,0 +1,47 @@
+from django.conf import settings
+
+from postings.utils import encode_cursor
+
+
+def serialize_comment(comment):
+    return {
+        'id'       : comment.id,
+        'content'  : comment.content,
+        'date'     : str(comment.created_at)[:10],
+        'user_name': comment.user.nickname
+    }
+
+def serialize_posting(posting):
+    comments = posting.comment_preview[:settings.FEED_COMMENT_PREVIEW_SIZE]
+
+    return {
+        'feedId'      : posting.id,
+        'feeduserId'  : posting.user.id,
+        'feedUserName': posting.user.nickname,
+        'src'         : posting.feed_image_url or posting.image_url,
+        'images'      : {
+            'thumbnail' : posting.thumbnail_image_url or posting.image_url,
+            'feed'      : posting.feed_image_url or posting.image_url,
+            'full'      : posting.full_image_url or posting.image_url,
+            'original'  : posting.image_url,
+        },
+        'content'     : posting.content,
+        'postedDate'  : str(posting.created_at)[:10],
+        'designType'  : posting.design_type_id,
+        'comment'     : [serialize_comment(comment) for comment in reversed(comments)],
+        'commentCount': posting.comment_count,
+        'bookmarkCount': posting.bookmark_count,
+        'commentNextCursor': encode_cursor(comments[-1].created_at, comments[-1].id)\
+                             if posting.comment_count > len(comments) else None,
+        'tags' : [{
+            'id'           : tag.id,
+            'product_id'   : tag.product.id,
+            'xx'           : tag.x,
+            'yy'           : tag.y,
+            'product_title': tag.product.product_name,
+            'product_price': round(tag.product.price),
+            'thumbnail_url': tag.product.thumbnail_url
+        } for tag in posting.tag_set.all()],
+        'follow'  : False,
+        'bookmark': False
+    }
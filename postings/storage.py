@@ -0,0 +1,93 @@
+import abc, os, shutil, threading, boto3
+
+from boto3.s3.transfer import TransferConfig
+from botocore.config   import Config
+
+from django.conf                 import settings
+from django.utils.module_loading import import_string
+
+
+class Storage(abc.ABC):
+    @abc.abstractmethod
+    def save(self, key, fileobj, content_type):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key):
+        pass
+
+    @abc.abstractmethod
+    def url(self, key):
+        pass
+
+
+class S3Storage(Storage):
+    _client      = None
+    _client_pid  = None
+    _client_lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None or cls._client_pid != os.getpid():
+            with cls._client_lock:
+                if cls._client is None or cls._client_pid != os.getpid():
+                    cls._client = boto3.session.Session().client(
+                        's3',
+                        aws_access_key_id     = settings.AWS_S3_ACCESS_KEY_ID,
+                        aws_secret_access_key = settings.AWS_S3_SECRET_ACCESS_KEY,
+                        config                = Config(max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS),
+                    )
+                    cls._client_pid = os.getpid()
+
+        return cls._client
+
+    @classmethod
+    def get_transfer_config(cls):
+        return TransferConfig(
+            multipart_threshold = settings.AWS_S3_MULTIPART_THRESHOLD,
+            multipart_chunksize = settings.AWS_S3_MULTIPART_CHUNKSIZE,
+            max_concurrency     = settings.AWS_S3_MAX_CONCURRENCY,
+        )
+
+    def save(self, key, fileobj, content_type):
+        self.get_client().upload_fileobj(
+            fileobj,
+            settings.AWS_STORAGE_BUCKET_NAME,
+            key,
+            ExtraArgs = {
+                'ContentType' : content_type
+            },
+            Config = self.get_transfer_config()
+        )
+
+    def delete(self, key):
+        self.get_client().delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+
+    def url(self, key):
+        return settings.S3_URL + key
+
+
+class LocalStorage(Storage):
+    def __init__(self, location=None, base_url=None):
+        self.location = str(location or settings.LOCAL_STORAGE_ROOT)
+        self.base_url = base_url or settings.LOCAL_STORAGE_URL
+
+    def path(self, key):
+        return os.path.join(self.location, key)
+
+    def save(self, key, fileobj, content_type):
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+
+        with open(self.path(key), 'wb') as destination:
+            shutil.copyfileobj(fileobj, destination)
+
+    def delete(self, key):
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    def url(self, key):
+        return self.base_url + key
+
+
+def get_storage():
+    return import_string(settings.POSTING_STORAGE_BACKEND)()
@@ -1,15 +1,34 @@
 from django.http import response
-import jwt
-
-from django.test                    import TestCase, Client
+import jwt, os, shutil, tempfile, threading
+
+from datetime                       import timedelta
+from io                             import BytesIO, StringIO
+from PIL                            import Image
+from django.test                    import TestCase, Client, override_settings
+from django.core.management         import call_command
+from django.db                      import connection
+from django.db.models               import F
+from django.core.cache              import caches
+from django.utils                   import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock                  import MagicMock, patch
-
-from users.models      import User, Bookmark
-from postings.models   import DesignType, Posting, Comment, Tag
+from concurrent.futures.process     import BrokenProcessPool
+
+from users.models      import User, Bookmark, Follow
+from postings.models   import DesignType, Posting, Comment, Tag, Timeline
+from postings.timeline import fan_out, prune_many
+from postings.fragments import stats as fragment_stats, comment_previews, get_fragments
+from postings.storage   import LocalStorage, S3Storage
+from postings           import images
 from my_settings       import SECRET_KEY, ALGORITHM
 from products.models   import Product
 
+MEDIA_ROOT = tempfile.mkdtemp()
+
+def tearDownModule():
+    shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+@override_settings(POSTING_STORAGE_BACKEND='postings.storage.LocalStorage', LOCAL_STORAGE_ROOT=MEDIA_ROOT, POSTING_UPLOAD_SPOOL_DIR=MEDIA_ROOT, POSTING_UPLOAD_WORKERS=0, POSTING_IMAGE_WORKERS=0)
 class PostingTest(TestCase):
     @classmethod
     def setUpTestData(self):
@@ -45,15 +64,10 @@ class PostingTest(TestCase):
         DesignType.objects.all().delete()
         User.objects.all().delete()
 
-    @patch('postings.views.boto3.client')
-    def test_posting_success(self, mocked_s3_client):
+    def test_posting_success(self):
         client = Client()
         access_token = jwt.encode({'id' : 1}, SECRET_KEY, algorithm=ALGORITHM)
 
-        class MockedResponse:
-            def upload(self):
-                return None
-
         image_file = SimpleUploadedFile(
             'file.jpg',
             b'file_content',
@@ -69,20 +83,14 @@ class PostingTest(TestCase):
             'list'       : '{"tags" : [{"xx" : 101, "yy" : 201,"product_id" : 1}]}'
         }
 
-        mocked_s3_client.upload = MagicMock(return_value=MockedResponse())
-        response                = client.post("/posting", body, **headers)
+        response = client.post("/posting", body, **headers)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'MESSAGE' : 'POSTING_SUCCESS'} )
 
-    @patch('postings.views.boto3.client')
-    def test_posting_empty_image(self, mocked_s3_client):
+    def test_posting_empty_image(self):
         client       = Client()
         access_token = jwt.encode({'id' : 1}, SECRET_KEY, algorithm=ALGORITHM)
 
-        class MockedResponse:
-            def upload(self):
-                return None
-
         headers = {'HTTP_AUTHORIZATION': access_token}
 
         body = {
@@ -92,21 +100,15 @@ class PostingTest(TestCase):
             'list'       : '{"tags" : [{"xx" : 101, "yy" : 201,"product_id" : 1}]}'
         }
 
-        mocked_s3_client.upload = MagicMock(return_value=MockedResponse())
-        response                = client.post("/posting", body, **headers)
+        response = client.post("/posting", body, **headers)
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'MESSAGE' : 'IMAGE_EMPTY'} )
 
-    @patch('postings.views.boto3.client')
-    def test_posting_design_type_does_not_exist(self, mocked_s3_client):
+    def test_posting_design_type_does_not_exist(self):
         client       = Client()
         access_token = jwt.encode({'id' : 1}, SECRET_KEY, algorithm=ALGORITHM)
 
-        class MockedResponse:
-            def upload(self):
-                return None
-
         headers = {'HTTP_AUTHORIZATION': access_token}
 
         image_file = SimpleUploadedFile(
@@ -122,21 +124,15 @@ class PostingTest(TestCase):
             'list'       : '{"tags" : [{"xx" : 101, "yy" : 201,"product_id" : 1}]}'
         }
 
-        mocked_s3_client.upload = MagicMock(return_value=MockedResponse())
-        response                = client.post("/posting", body, **headers)
+        response = client.post("/posting", body, **headers)
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'MESSAGE' : 'DESIGN_TYPE_DOES_NOT_EXIST'} )
 
-    @patch('postings.views.boto3.client')
-    def test_posting_tag_invalid_keys(self, mocked_s3_client):
+    def test_posting_tag_invalid_keys(self):
         client       = Client()
         access_token = jwt.encode({'id' : 1}, SECRET_KEY, algorithm=ALGORITHM)
 
-        class MockedResponse:
-            def upload(self):
-                return None
-
         headers = {'HTTP_AUTHORIZATION': access_token}
 
         image_file = SimpleUploadedFile(
@@ -152,12 +148,31 @@ class PostingTest(TestCase):
             'list'       : '{"tags" : [{"xx_key_error" : 101, "yy" : 201,"product_id" : 1}]}'
         }
 
-        mocked_s3_client.upload = MagicMock(return_value=MockedResponse())
-        response                = client.post("/posting", body, **headers)
+        response = client.post("/posting", body, **headers)
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'MESSAGE' : 'KEY_ERROR'} )
 
+    def test_posting_post_invalid_coordinate(self):
+        client       = Client()
+        access_token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+        postings     = Posting.objects.count()
+
+        for tag in ['{"xx" : "left", "yy" : 201, "product_id" : 1}', '{"xx" : 101, "yy" : null, "product_id" : 1}']:
+            body = {
+                'content'    : 'just moved!',
+                'design_type': '거실',
+                'file'       : SimpleUploadedFile('file.jpg', b'file_content', content_type='image/ief'),
+                'list'       : '{"tags" : [%s]}' % tag
+            }
+
+            response = client.post("/posting", body, HTTP_AUTHORIZATION=access_token)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'MESSAGE' : 'INVALID_COORDINATE'})
+
+        self.assertEqual(Posting.objects.count(), postings)
+
 class BookmarkTest(TestCase):
     @classmethod
     def setUpTestData(self):
@@ -329,7 +344,8 @@ class PostingFeedTest(TestCase):
 
         Tag.objects.create(
             id         = 1,
-            coordinate = '(101, 201)',
+            x          = 101,
+            y          = 201,
             posting    = Posting.objects.get(id=1),
             product    = Product.objects.get(id=1)
         )
@@ -345,10 +361,14 @@ class PostingFeedTest(TestCase):
         User.objects.all().delete()
 
     def test_posting_public_feed_get_success(self):
+        caches['fragments'].clear()
+
         client   = Client()
         response = client.get('/postings/feed/public')
 
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['POSTING_FEED'][0]['tags'][0]['xx'], 101)
+        self.assertEqual(response.json()['POSTING_FEED'][0]['tags'][0]['yy'], 201)
 
     def test_posting_private_feed_get_success(self):
         client   = Client()
@@ -356,3 +376,700 @@ class PostingFeedTest(TestCase):
         response = client.get('/postings/feed/private?page=1', **headers)
 
         self.assertEqual(response.status_code, 200)
+
+class PostingFeedCursorTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.create(
+            id          = 1,
+            nickname    = 'wecode',
+            kakao_id    = 1,
+            kakao_email = 'wecode@gmail.com'
+        )
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        Posting.objects.bulk_create([
+            Posting(
+                id          = i,
+                content     = f'posting{i}',
+                image_url   = f'wecode_image{i}.com',
+                design_type = DesignType.objects.get(id=1),
+                user        = User.objects.get(id=1)
+            ) for i in range(1, 8)
+        ])
+
+    def test_posting_public_feed_cursor_walks_all_postings(self):
+        client   = Client()
+        seen     = []
+        response = client.get('/postings/feed/public?limit=3')
+
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += [posting['feedId'] for posting in response.json()['POSTING_FEED']]
+
+            if not response.json()['HAS_NEXT']:
+                break
+
+            response = client.get('/postings/feed/public', {'cursor' : response.json()['NEXT_CURSOR'], 'limit' : 3})
+
+        self.assertEqual(seen, [7, 6, 5, 4, 3, 2, 1])
+        self.assertIsNone(response.json()['NEXT_CURSOR'])
+
+    def test_posting_public_feed_page_still_supported(self):
+        client   = Client()
+        response = client.get('/postings/feed/public?page=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([posting['feedId'] for posting in response.json()['POSTING_FEED']], [2, 1])
+        self.assertFalse(response.json()['HAS_NEXT'])
+
+    def test_posting_public_feed_invalid_cursor(self):
+        client   = Client()
+        response = client.get('/postings/feed/public?cursor=wecode')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'INVALID_CURSOR'})
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'wecode{i}',
+                kakao_id    = i,
+                kakao_email = f'wecode{i}@gmail.com'
+            ) for i in range(1, 4)
+        ])
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        Posting.objects.bulk_create([
+            Posting(
+                id          = i,
+                content     = f'posting{i}',
+                image_url   = f'wecode_image{i}.com',
+                design_type = DesignType.objects.get(id=1),
+                user        = User.objects.get(id=2 if i % 2 else 3)
+            ) for i in range(1, 5)
+        ])
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def get_feed_ids(self):
+        client   = Client()
+        response = client.get('/postings/feed/private', HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(response.status_code, 200)
+        return [posting['feedId'] for posting in response.json()['POSTING_FEED']]
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        client = Client()
+
+        client.post('/users/follow', {'user_id': 2}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+        self.assertEqual(self.get_feed_ids(), [3, 1])
+
+        client.post('/users/follow', {'user_id': 2}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+        self.assertEqual(self.get_feed_ids(), [])
+        self.assertFalse(Timeline.objects.filter(user_id=1).exists())
+
+    def test_prune_keeps_own_postings(self):
+        fan_out(Posting.objects.get(id=1))
+
+        prune_many(2, [2, 3])
+
+        self.assertTrue(Timeline.objects.filter(user_id=2, posting_id=1).exists())
+
+    def test_fan_out_pushes_posting_to_followers(self):
+        Follow.objects.create(follower_id=1, followed_id=3)
+
+        fan_out(Posting.objects.get(id=4))
+
+        self.assertEqual(self.get_feed_ids(), [4])
+        self.assertTrue(Timeline.objects.filter(user_id=3, posting_id=4).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_fan_out_on_read_for_accounts_with_many_followers(self):
+        Follow.objects.create(follower_id=1, followed_id=3)
+        User.objects.filter(id=3).update(follower_count=1)
+
+        fan_out(Posting.objects.get(id=4))
+
+        self.assertTrue(User.objects.get(id=3).fanout_on_read)
+        self.assertFalse(Timeline.objects.filter(user_id=1).exists())
+        self.assertEqual(self.get_feed_ids(), [4, 2])
+
+    def test_rebuild_timelines_command(self):
+        Follow.objects.create(follower_id=1, followed_id=2)
+
+        call_command('rebuild_timelines', users=[1], stdout=StringIO())
+
+        self.assertEqual(self.get_feed_ids(), [3, 1])
+
+class FeedViewerStateTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'wecode{i}',
+                kakao_id    = i,
+                kakao_email = f'wecode{i}@gmail.com'
+            ) for i in range(1, 7)
+        ])
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def create_postings(self, count):
+        for i in range(2, count + 2):
+            Follow.objects.get_or_create(follower_id=1, followed_id=i)
+
+            posting = Posting.objects.create(
+                content     = f'posting{i}',
+                image_url   = f'wecode_image{i}.com',
+                design_type = DesignType.objects.get(id=1),
+                user_id     = i
+            )
+
+            fan_out(posting)
+            Bookmark.objects.create(user_id=1, posting=posting)
+
+    def count_feed_queries(self):
+        client  = Client()
+        queries = []
+
+        caches['fragments'].clear()
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = client.get('/postings/feed/private', HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()['POSTING_FEED']
+
+    def test_private_feed_query_count_is_constant(self):
+        self.create_postings(1)
+        single_count, feed = self.count_feed_queries()
+
+        self.create_postings(5)
+        page_count, feed = self.count_feed_queries()
+
+        self.assertEqual(single_count, page_count)
+        self.assertEqual(len(feed), 5)
+        self.assertTrue(all(posting['follow'] and posting['bookmark'] for posting in feed))
+
+class PostingFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.create(
+            id          = 1,
+            nickname    = 'wecode',
+            kakao_id    = 1,
+            kakao_email = 'wecode@gmail.com'
+        )
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        Posting.objects.create(
+            id          = 1,
+            content     = 'wow',
+            image_url   = 'wecode_image1.com',
+            design_type = DesignType.objects.get(id=1),
+            user        = User.objects.get(id=1)
+        )
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def setUp(self):
+        caches['fragments'].clear()
+        fragment_stats.reset()
+
+    def get_comments(self):
+        response = Client().get('/postings/feed/public')
+
+        self.assertEqual(response.status_code, 200)
+        return [comment['content'] for comment in response.json()['POSTING_FEED'][0]['comment']]
+
+    def test_fragment_cache_hit_after_first_read(self):
+        self.get_comments()
+        self.get_comments()
+
+        self.assertEqual(fragment_stats.snapshot(), {'hits' : 1, 'misses' : 1, 'hit_rate' : 0.5})
+
+    def test_comment_writes_invalidate_fragment(self):
+        client = Client()
+
+        self.assertEqual(self.get_comments(), [])
+
+        client.post('/postings/1/comment', {'content' : 'hi'}, content_type='application/json', HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(self.get_comments(), ['hi'])
+
+        comment_id = Comment.objects.get(posting_id=1).id
+
+        client.patch(f'/comment/{comment_id}', {'content' : 'hello'}, content_type='application/json')
+        self.assertEqual(self.get_comments(), ['hello'])
+
+        client.delete(f'/comment/{comment_id}')
+        self.assertEqual(self.get_comments(), [])
+        self.assertEqual(fragment_stats.hits, 0)
+
+    def test_product_writes_invalidate_tagged_fragments(self):
+        product = Product.objects.create(id=1, product_name='chair', price=1000, thumbnail_url='chair.com')
+        Tag.objects.create(posting_id=1, product=product, x=1, y=1)
+        Posting.objects.filter(id=1).update(cache_version=F('cache_version') + 1)
+
+        def get_tags():
+            return Client().get('/postings/feed/public').json()['POSTING_FEED'][0]['tags']
+
+        self.assertEqual(get_tags()[0]['product_price'], 1000)
+
+        product.price = 2000
+        product.save()
+        self.assertEqual(get_tags()[0]['product_price'], 2000)
+
+        product.delete()
+        self.assertEqual(get_tags(), [])
+
+    def test_posting_bumped_between_reads_is_rendered_fresh(self):
+        postings = list(Posting.objects.all())
+        Posting.objects.filter(id=1).update(content='edited', cache_version=F('cache_version') + 1)
+
+        self.assertEqual([fragment['content'] for fragment in get_fragments(postings)], ['edited'])
+
+class CommentPreviewTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.create(
+            id          = 1,
+            nickname    = 'wecode',
+            kakao_id    = 1,
+            kakao_email = 'wecode@gmail.com'
+        )
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        Posting.objects.create(
+            id          = 1,
+            content     = 'wow',
+            image_url   = 'wecode_image1.com',
+            design_type = DesignType.objects.get(id=1),
+            user        = User.objects.get(id=1)
+        )
+
+        for i in range(1, 6):
+            Comment.objects.create(
+                id      = i,
+                content = f'comment{i}',
+                posting = Posting.objects.get(id=1),
+                user    = User.objects.get(id=1)
+            )
+
+        Posting.objects.filter(id=1).update(comment_count=5)
+
+    def setUp(self):
+        caches['fragments'].clear()
+
+    def test_feed_embeds_latest_comments_and_count(self):
+        response = Client().get('/postings/feed/public')
+        posting  = response.json()['POSTING_FEED'][0]
+
+        self.assertEqual([comment['id'] for comment in posting['comment']], [3, 4, 5])
+        self.assertEqual(posting['commentCount'], 5)
+        self.assertIsNotNone(posting['commentNextCursor'])
+
+    def test_previews_are_bounded_when_comments_share_a_timestamp(self):
+        Comment.objects.update(created_at=timezone.now())
+
+        self.assertEqual([comment.id for comment in comment_previews([1], 3)[1]], [5, 4, 3])
+
+    def test_previews_fetch_at_most_size_rows_per_posting(self):
+        Posting.objects.create(id=2, content='second', image_url='wecode_image2.com', design_type_id=1, user_id=1)
+        Posting.objects.create(id=3, content='third', image_url='wecode_image3.com', design_type_id=1, user_id=1)
+
+        for i in range(6, 10):
+            Comment.objects.create(id=i, content=f'comment{i}', posting_id=2, user_id=1)
+
+        Comment.objects.create(id=10, content='comment10', posting_id=3, user_id=1)
+
+        with self.assertNumQueries(2):
+            previews = comment_previews([1, 2, 3], 2)
+
+            self.assertEqual([comment.user.nickname for comment in previews[2]], ['wecode', 'wecode'])
+
+        self.assertEqual([comment.id for comment in previews[1]], [5, 4])
+        self.assertEqual([comment.id for comment in previews[2]], [9, 8])
+        self.assertEqual([comment.id for comment in previews[3]], [10])
+
+    def test_comment_list_pages_through_remaining_comments(self):
+        client   = Client()
+        cursor   = client.get('/postings/feed/public').json()['POSTING_FEED'][0]['commentNextCursor']
+        response = client.get('/postings/1/comments', {'cursor' : cursor})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([comment['id'] for comment in response.json()['COMMENTS']], [2, 1])
+        self.assertFalse(response.json()['HAS_NEXT'])
+
+    def test_comment_list_limit(self):
+        response = Client().get('/postings/1/comments?limit=2')
+
+        self.assertEqual([comment['id'] for comment in response.json()['COMMENTS']], [5, 4])
+        self.assertTrue(response.json()['HAS_NEXT'])
+
+    def test_comment_list_posting_does_not_exist(self):
+        response = Client().get('/postings/2/comments')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'POSTING_DOES_NOT_EXIST'})
+
+class EngagementCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'wecode{i}',
+                kakao_id    = i,
+                kakao_email = f'wecode{i}@gmail.com'
+            ) for i in range(1, 3)
+        ])
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        Posting.objects.create(
+            id          = 1,
+            content     = 'wow',
+            image_url   = 'wecode_image1.com',
+            design_type = DesignType.objects.get(id=1),
+            user        = User.objects.get(id=2)
+        )
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def test_counters_follow_writes(self):
+        client = Client()
+
+        client.post('/postings/1/comment', {'content' : 'hi'}, content_type='application/json', HTTP_AUTHORIZATION=self.token)
+        client.post('/postings/1/bookmark', HTTP_AUTHORIZATION=self.token)
+        client.post('/users/follow', {'user_id': 2}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        posting = Posting.objects.get(id=1)
+        self.assertEqual((posting.comment_count, posting.bookmark_count), (1, 1))
+        self.assertEqual(User.objects.get(id=2).follower_count, 1)
+        self.assertEqual(User.objects.get(id=1).following_count, 1)
+
+        client.delete(f'/comment/{Comment.objects.get(posting_id=1).id}')
+        client.post('/postings/1/bookmark', HTTP_AUTHORIZATION=self.token)
+        client.post('/users/follow', {'user_id': 2}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        posting = Posting.objects.get(id=1)
+        self.assertEqual((posting.comment_count, posting.bookmark_count), (0, 0))
+        self.assertEqual(User.objects.get(id=2).follower_count, 0)
+        self.assertEqual(User.objects.get(id=1).following_count, 0)
+
+    def test_reconcile_counters_command(self):
+        Comment.objects.create(posting_id=1, user_id=1, content='hi')
+        Bookmark.objects.create(posting_id=1, user_id=1)
+        Follow.objects.create(follower_id=1, followed_id=2)
+        Posting.objects.filter(id=1).update(bookmark_count=7)
+
+        output = StringIO()
+        call_command('reconcile_counters', batch_size=1, stdout=output)
+
+        self.assertEqual(output.getvalue().strip(), 'Reconciled 1 postings and 2 users')
+
+        posting = Posting.objects.get(id=1)
+        self.assertEqual((posting.comment_count, posting.bookmark_count), (1, 1))
+        self.assertEqual(User.objects.get(id=2).follower_count, 1)
+        self.assertEqual(User.objects.get(id=1).following_count, 1)
+
+@override_settings(POSTING_STORAGE_BACKEND='postings.storage.LocalStorage', LOCAL_STORAGE_ROOT=MEDIA_ROOT, POSTING_UPLOAD_SPOOL_DIR=MEDIA_ROOT, POSTING_UPLOAD_WORKERS=0, POSTING_IMAGE_WORKERS=0)
+class PostingUploadPipelineTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.create(
+            id          = 1,
+            nickname    = 'Jun',
+            kakao_id    = 1,
+            kakao_email = '123'
+        )
+
+        DesignType.objects.create(
+            id   = 1,
+            name = '거실'
+        )
+
+        self.token = jwt.encode({'id' : 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def setUp(self):
+        caches['fragments'].clear()
+
+    def post_posting(self, content=b'file_content'):
+        body = {
+            'content'    : 'just moved!',
+            'design_type': '거실',
+            'file'       : SimpleUploadedFile('file.jpg', content, content_type='image/jpeg'),
+            'list'       : '{"tags" : []}'
+        }
+
+        return Client().post('/posting', body, HTTP_AUTHORIZATION=self.token)
+
+    def public_feed_ids(self):
+        return [posting['feedId'] for posting in Client().get('/postings/feed/public').json()['POSTING_FEED']]
+
+    def test_posting_is_pending_until_upload_finishes(self):
+        response = self.post_posting()
+        posting  = Posting.objects.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(posting.status, Posting.Status.PENDING)
+        self.assertEqual(self.public_feed_ids(), [])
+
+    def test_sweep_deletes_stale_pending_postings(self):
+        self.post_posting()
+        self.post_posting()
+
+        stale, fresh = Posting.objects.order_by('id')
+        Posting.objects.filter(id=stale.id).update(created_at=timezone.now() - timedelta(minutes=31))
+
+        call_command('sweep_pending_postings', older_than=30, stdout=StringIO())
+
+        self.assertEqual(list(Posting.objects.values_list('id', flat=True)), [fresh.id])
+
+    def test_upload_marks_posting_ready(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_posting()
+
+        posting = Posting.objects.get()
+        key     = posting.image_url[len('/media/'):]
+
+        self.assertEqual(posting.status, Posting.Status.READY)
+        self.assertTrue(os.path.exists(LocalStorage().path(key)))
+        self.assertEqual(self.public_feed_ids(), [posting.id])
+        self.assertTrue(Timeline.objects.filter(user_id=1, posting=posting).exists())
+
+    def jpeg(self, width, height, orientation=1):
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        data = BytesIO()
+
+        Image.new('RGB', (width, height), 'white').save(data, 'JPEG', quality=95, exif=exif)
+
+        return data.getvalue()
+
+    def stored_size(self, url):
+        with Image.open(LocalStorage().path(url[len('/media/'):])) as image:
+            return image.size
+
+    def test_upload_stores_image_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_posting(self.jpeg(3000, 2000))
+
+        posting = Posting.objects.get()
+        feed    = Client().get('/postings/feed/public').json()['POSTING_FEED'][0]
+
+        self.assertEqual(self.stored_size(posting.image_url), (3000, 2000))
+        self.assertEqual(self.stored_size(posting.thumbnail_image_url), (320, 320))
+        self.assertEqual(self.stored_size(posting.feed_image_url), (1080, 720))
+        self.assertEqual(self.stored_size(posting.full_image_url), (2048, 1365))
+        self.assertEqual(feed['src'], posting.feed_image_url)
+        self.assertEqual(feed['images'], {
+            'thumbnail' : posting.thumbnail_image_url,
+            'feed'      : posting.feed_image_url,
+            'full'      : posting.full_image_url,
+            'original'  : posting.image_url,
+        })
+        self.assertEqual([name for name in os.listdir(MEDIA_ROOT) if name.startswith('tmp') and name.endswith('.jpg')], [])
+
+    def test_upload_never_upscales_small_images(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_posting(self.jpeg(200, 150))
+
+        posting = Posting.objects.get()
+
+        self.assertEqual(self.stored_size(posting.thumbnail_image_url), (150, 150))
+        self.assertEqual(self.stored_size(posting.feed_image_url), (200, 150))
+
+    def test_panorama_thumbnail_keeps_full_height(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_posting(self.jpeg(16000, 400))
+
+        posting = Posting.objects.get()
+
+        self.assertEqual(self.stored_size(posting.thumbnail_image_url), (320, 320))
+        self.assertEqual(self.stored_size(posting.feed_image_url), (1080, 27))
+
+    @override_settings(POSTING_IMAGE_WORKERS=1)
+    def test_upload_renders_rotated_image_in_process_pool(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_posting(self.jpeg(600, 400, orientation=6))
+
+        posting = Posting.objects.get()
+
+        self.assertEqual(self.stored_size(posting.feed_image_url), (400, 600))
+        self.assertEqual(self.stored_size(posting.thumbnail_image_url), (320, 320))
+
+    def assert_published_original_only(self, content):
+        with self.assertLogs('postings.images', level='WARNING'), self.captureOnCommitCallbacks(execute=True):
+            self.post_posting(content)
+
+        posting = Posting.objects.get()
+        feed    = Client().get('/postings/feed/public').json()['POSTING_FEED'][0]
+
+        self.assertEqual(posting.status, Posting.Status.READY)
+        self.assertEqual(feed['src'], posting.image_url)
+        self.assertEqual(set(feed['images'].values()), {posting.image_url})
+
+    def test_undecodable_upload_falls_back_to_original(self):
+        self.assert_published_original_only(b'file_content')
+
+    def test_truncated_upload_falls_back_to_original(self):
+        content = self.jpeg(600, 400)
+
+        self.assert_published_original_only(content[:len(content) // 2])
+
+    @patch('PIL.Image.MAX_IMAGE_PIXELS', 1000)
+    def test_decompression_bomb_falls_back_to_original(self):
+        self.assert_published_original_only(self.jpeg(600, 400))
+
+    @override_settings(POSTING_IMAGE_WORKERS=1)
+    def test_broken_pool_is_replaced_and_image_rendered_inline(self):
+        broken = images.get_pool()
+
+        with self.assertRaises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+
+        with self.assertLogs('postings.images', level='ERROR'), self.captureOnCommitCallbacks(execute=True):
+            self.post_posting(self.jpeg(600, 400))
+
+        posting = Posting.objects.get()
+
+        self.assertEqual(self.stored_size(posting.feed_image_url), (600, 400))
+        self.assertIsNot(images.get_pool(), broken)
+
+    @patch('postings.storage.LocalStorage.save', side_effect=OSError)
+    def test_failed_upload_removes_posting(self, mocked_save):
+        with self.assertLogs('postings.uploads', level='ERROR'), self.captureOnCommitCallbacks(execute=True):
+            self.post_posting()
+
+        spooled = mocked_save.call_args[0][1].name
+
+        self.assertFalse(Posting.objects.exists())
+        self.assertFalse(os.path.exists(spooled))
+
+class S3StorageClientTest(TestCase):
+    def tearDown(self):
+        S3Storage._client = None
+
+    def test_client_is_shared_across_threads(self):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(S3Storage.get_client())) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(client) for client in clients}), 1)
+        self.assertIs(S3Storage.get_client(), clients[0])
+
+class BookmarkBatchTest(TestCase):
+    @classmethod
+    def setUpTestData(self):
+        User.objects.create(id=1, nickname='wecode1', kakao_id=1, kakao_email='wecode1@gmail.com')
+        DesignType.objects.create(id=1, name='거실')
+
+        Posting.objects.bulk_create([
+            Posting(
+                id             = i,
+                content        = f'posting{i}',
+                image_url      = f'wecode_image{i}.com',
+                design_type_id = 1,
+                user_id        = 1
+            ) for i in range(1, 31)
+        ])
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def post_batch(self, data):
+        queries = []
+
+        caches['users'].clear()
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = Client().post('/postings/bookmarks', data, content_type='application/json', HTTP_AUTHORIZATION=self.token)
+
+        return response, len(queries)
+
+    def test_bookmark_batch_per_id_results(self):
+        Bookmark.objects.create(user_id=1, posting_id=2)
+        Bookmark.objects.create(user_id=1, posting_id=3)
+        Posting.objects.filter(id__in=[2, 3]).update(bookmark_count=1)
+
+        response, _ = self.post_batch({'add': [1, 2, 100], 'remove': [3, 4]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['RESULT'], [
+            {'posting_id': 1, 'result': 'BOOKMARK_CREATED'},
+            {'posting_id': 2, 'result': 'ALREADY_BOOKMARKED'},
+            {'posting_id': 100, 'result': 'POSTING_DOES_NOT_EXIST'},
+            {'posting_id': 3, 'result': 'BOOKMARK_DELETED'},
+            {'posting_id': 4, 'result': 'BOOKMARK_DOES_NOT_EXIST'},
+        ])
+        self.assertEqual(sorted(Bookmark.objects.filter(user_id=1).values_list('posting_id', flat=True)), [1, 2])
+        self.assertEqual(
+            dict(Posting.objects.filter(id__in=[1, 2, 3]).values_list('id', 'bookmark_count')),
+            {1: 1, 2: 1, 3: 0}
+        )
+
+    def test_bookmark_batch_query_count_is_constant(self):
+        Bookmark.objects.create(user_id=1, posting_id=30)
+        _, small = self.post_batch({'add': [1, 2], 'remove': [30]})
+
+        Bookmark.objects.create(user_id=1, posting_id=29)
+        _, large = self.post_batch({'add': list(range(3, 28)), 'remove': [29]})
+
+        self.assertEqual(small, large)
+        self.assertEqual(Bookmark.objects.filter(user_id=1).count(), 27)
+
+    def test_bookmark_batch_rejects_bad_input(self):
+        self.assertEqual(self.post_batch({'add': [1], 'remove': [1]})[0].json(), {'MESSAGE' : 'INVALID_IDS'})
+        self.assertEqual(self.post_batch({'add': ['a']})[0].json(), {'MESSAGE' : 'INVALID_IDS'})
+        self.assertEqual(self.post_batch({'add': [True]})[0].json(), {'MESSAGE' : 'INVALID_IDS'})
+        self.assertEqual(self.post_batch({'remove': [1.9]})[0].json(), {'MESSAGE' : 'INVALID_IDS'})
+        self.assertEqual(self.post_batch({'add': ['1']})[0].json(), {'MESSAGE' : 'INVALID_IDS'})
+        self.assertEqual(self.post_batch({})[0].json(), {'MESSAGE' : 'KEY_ERROR'})
+
+        with self.settings(BATCH_MUTATION_MAX_IDS=2):
+            response, _ = self.post_batch({'add': [1, 2, 3]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'TOO_MANY_IDS'})
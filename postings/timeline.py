@@ -0,0 +1,76 @@
+from django.conf import settings
+
+from postings.models import Posting, Timeline
+from postings.utils  import keyset_filter, encode_cursor
+from users.models    import User, Follow
+
+
+def _bulk_push(user_ids, posting):
+    entries = [Timeline(user_id=user_id, posting_id=posting.id, created_at=posting.created_at) for user_id in user_ids]
+    Timeline.objects.bulk_create(entries, batch_size=settings.TIMELINE_BATCH_SIZE, ignore_conflicts=True)
+
+def fan_out(posting):
+    if not posting.user_id:
+        return
+
+    follower_count = User.objects.filter(id=posting.user_id).values_list('follower_count', flat=True).first() or 0
+    fanout_on_read = follower_count > settings.TIMELINE_FANOUT_LIMIT
+
+    User.objects.filter(id=posting.user_id).exclude(fanout_on_read=fanout_on_read).update(fanout_on_read=fanout_on_read)
+
+    _bulk_push([posting.user_id], posting)
+
+    if fanout_on_read:
+        return
+
+    follower_ids = Follow.objects.filter(followed_id=posting.user_id).values_list('follower_id', flat=True)
+    _bulk_push(follower_ids.iterator(chunk_size=settings.TIMELINE_BATCH_SIZE), posting)
+
+def backfill(follower_id, followed_id):
+    backfill_many(follower_id, [followed_id])
+
+def backfill_many(follower_id, followed_ids):
+    push_ids = User.objects.filter(id__in=followed_ids, fanout_on_read=False).values('id')
+    postings = (
+        Posting.objects.filter(user_id__in=push_ids, status=Posting.Status.READY)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'created_at')[:settings.TIMELINE_BACKFILL_SIZE]
+    )
+
+    Timeline.objects.bulk_create([
+        Timeline(user_id=follower_id, posting_id=posting_id, created_at=created_at) for posting_id, created_at in postings
+    ], ignore_conflicts=True)
+
+def prune(follower_id, followed_id):
+    prune_many(follower_id, [followed_id])
+
+def prune_many(follower_id, followed_ids):
+    Timeline.objects.filter(user_id=follower_id, posting__user_id__in=followed_ids).exclude(posting__user_id=follower_id).delete()
+
+def rebuild(user_id):
+    Timeline.objects.filter(user_id=user_id).delete()
+
+    followed_ids = Follow.objects.filter(follower_id=user_id, followed__fanout_on_read=False).values('followed_id')
+    postings     = Posting.objects.filter(user_id__in=followed_ids) | Posting.objects.filter(user_id=user_id)
+    postings     = postings.filter(status=Posting.Status.READY).order_by('-created_at', '-id').values_list('id', 'created_at')[:settings.TIMELINE_BACKFILL_SIZE]
+
+    Timeline.objects.bulk_create([
+        Timeline(user_id=user_id, posting_id=posting_id, created_at=created_at) for posting_id, created_at in postings
+    ], batch_size=settings.TIMELINE_BATCH_SIZE, ignore_conflicts=True)
+
+def timeline_page(user_id, limit, cursor=None, offset=0):
+    size    = offset + limit + 1
+    entries = list(
+        keyset_filter(Timeline.objects.filter(user_id=user_id), cursor, id_field='posting_id').values_list('created_at', 'posting_id')[:size]
+    )
+
+    pull_author_ids = Follow.objects.filter(follower_id=user_id, followed__fanout_on_read=True).values('followed_id')
+    entries += keyset_filter(Posting.objects.filter(user_id__in=pull_author_ids, status=Posting.Status.READY), cursor).values_list('created_at', 'id')[:size]
+
+    entries  = sorted(set(entries), reverse=True)[offset:size]
+    has_next = len(entries) > limit
+    entries  = entries[:limit]
+
+    next_cursor = encode_cursor(*entries[-1]) if has_next else None
+
+    return [posting_id for created_at, posting_id in entries], next_cursor
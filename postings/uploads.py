@@ -0,0 +1,92 @@
+import os, logging, tempfile, threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db   import transaction, connection
+
+from postings.models    import Posting
+from postings.storage   import get_storage
+from postings.images    import derive, remove, variant_key
+from postings.timeline  import fan_out
+from postings.fragments import bump_version
+from products.trending  import record_postings
+
+logger = logging.getLogger(__name__)
+
+_executor      = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.POSTING_UPLOAD_WORKERS, thread_name_prefix='posting-upload')
+
+        return _executor
+
+def spool(upload):
+    with tempfile.NamedTemporaryFile(delete=False, dir=settings.POSTING_UPLOAD_SPOOL_DIR, suffix='.upload') as spooled:
+        for chunk in upload.chunks():
+            spooled.write(chunk)
+
+    return spooled.name
+
+def process_upload(posting_id, spool_path, key, content_type):
+    storage = get_storage()
+    keys    = [key]
+    derived = {}
+
+    try:
+        with open(spool_path, 'rb') as spooled:
+            storage.save(key, spooled, content_type)
+
+        derived = derive(spool_path)
+        urls    = {}
+
+        for name, path in derived.items():
+            keys.append(variant_key(key, name))
+
+            with open(path, 'rb') as rendered:
+                storage.save(keys[-1], rendered, 'image/jpeg')
+
+            urls[f'{name}_image_url'] = storage.url(keys[-1])
+
+        with transaction.atomic():
+            if not Posting.objects.filter(id=posting_id, status=Posting.Status.PENDING).update(status=Posting.Status.READY, **urls):
+                raise Posting.DoesNotExist(posting_id)
+
+            fan_out(Posting.objects.get(id=posting_id))
+            bump_version(id=posting_id)
+            record_postings('tag', [posting_id])
+
+    except Exception:
+        logger.exception('Upload of posting %s failed', posting_id)
+
+        Posting.objects.filter(id=posting_id, status=Posting.Status.PENDING).delete()
+
+        for stored in keys:
+            try:
+                storage.delete(stored)
+
+            except Exception:
+                logger.exception('Could not remove %s after a failed upload', stored)
+
+    finally:
+        os.remove(spool_path)
+        remove(derived)
+
+def _run_in_worker(*args):
+    try:
+        process_upload(*args)
+
+    finally:
+        connection.close()
+
+def submit(posting_id, spool_path, key, content_type):
+    if not settings.POSTING_UPLOAD_WORKERS:
+        return process_upload(posting_id, spool_path, key, content_type)
+
+    get_executor().submit(_run_in_worker, posting_id, spool_path, key, content_type)
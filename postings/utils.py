@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from django.conf      import settings
+from django.db.models import Case, F, Q, Value, When
+
+
+def encode_cursor(created_at, object_id):
+    return f'{created_at.isoformat()},{object_id}'
+
+def decode_cursor(cursor):
+    created_at, object_id = cursor.rsplit(',', 1)
+
+    return datetime.fromisoformat(created_at), int(object_id)
+
+def get_limit(request, default=None):
+    limit = int(request.GET.get('limit', default or settings.FEED_PAGE_SIZE))
+
+    return max(1, min(limit, settings.FEED_MAX_PAGE_SIZE))
+
+def parse_id(object_id):
+    if isinstance(object_id, bool) or not isinstance(object_id, int):
+        raise ValueError(f'{object_id!r} is not an id')
+
+    return object_id
+
+def get_batch_ids(data):
+    add    = list(dict.fromkeys(parse_id(object_id) for object_id in data.get('add', [])))
+    remove = list(dict.fromkeys(parse_id(object_id) for object_id in data.get('remove', [])))
+
+    if set(add) & set(remove):
+        raise ValueError('ids cannot be both added and removed')
+
+    return add, remove
+
+def shift(field, delta):
+    if delta >= 0:
+        return F(field) + delta
+
+    return Case(When(**{f'{field}__gte' : -delta}, then=F(field) + delta), default=Value(0))
+
+def keyset_filter(queryset, cursor, field='created_at', id_field='id'):
+    if cursor:
+        created_at, object_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt' : created_at}) | Q(**{field : created_at, f'{id_field}__lt' : object_id})
+        )
+
+    return queryset.order_by(f'-{field}', f'-{id_field}')
+
+def keyset_page(queryset, cursor, limit, field='created_at'):
+    rows     = list(keyset_filter(queryset, cursor, field)[:limit + 1])
+    has_next = len(rows) > limit
+    rows     = rows[:limit]
+
+    next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].id) if has_next else None
+
+    return rows, next_cursor
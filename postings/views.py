@@ -1,21 +1,29 @@
-import boto3, uuid, json
+import os, uuid, json
 
+from django.conf           import settings
 from django.http           import JsonResponse
 from django.views          import View
 from django.db             import transaction
-from django.db.models      import Prefetch
+from django.db.models      import F
 from django.core.paginator import Paginator
 
 from postings.models          import Posting, DesignType, Tag, Comment
-from homestagram.settings     import AWS_STORAGE_BUCKET_NAME, AWS_S3_SECRET_ACCESS_KEY, AWS_S3_ACCESS_KEY_ID, S3_URL
-from users.utils              import SignInDecorator
-from users.models             import Bookmark, Follow
+from postings.fragments       import get_fragments, bump_version
+from postings.serializers     import serialize_comment
+from postings.utils           import keyset_page, get_limit, get_batch_ids
+from postings.timeline        import timeline_page
+from postings.storage         import get_storage
+from postings.uploads         import spool, submit
+from users.utils              import SignInDecorator, lock_user
+from users.models             import Bookmark
+from users.viewer_state       import ViewerState
 from products.models          import Product
+from products.trending        import record_postings
 from decorators               import query_debugger
+from responses                import StreamingJsonResponse, chunked
 
 class PostingView(View):
     @SignInDecorator
-    @transaction.atomic
     def post(self, request):
         try:
             content     = request.POST.get('content')
@@ -27,37 +35,41 @@ class PostingView(View):
             if not image:
                 return JsonResponse({'MESSAGE' : 'IMAGE_EMPTY'}, status=400)
 
-            with transaction.atomic():
-                upload_key = str(uuid.uuid4()) + image.name
-                s3_client  = boto3.client(
-                    's3',
-                    aws_access_key_id     = AWS_S3_ACCESS_KEY_ID,
-                    aws_secret_access_key = AWS_S3_SECRET_ACCESS_KEY,
-                )
-            
-                posting = Posting.objects.create(
-                    content     = content,
-                    image_url   = S3_URL + upload_key,
-                    design_type = DesignType.objects.get(name=design_type),
-                    user        = user
-                )
-
-                Tag.objects.bulk_create(
-                    Tag(
-                        coordinate = (tag['xx'], tag['yy']),
-                        posting = posting,
-                        product = Product.objects.get(id=tag['product_id'])
-                    ) for tag in tags
-                )
-
-                s3_client.upload_fileobj(
-                    image,
-                    AWS_STORAGE_BUCKET_NAME,
-                    upload_key,
-                    ExtraArgs = {
-                        'ContentType' : image.content_type
-                    }
-                )
+            try:
+                coordinates = [(int(tag['xx']), int(tag['yy'])) for tag in tags]
+
+            except (ValueError, TypeError):
+                return JsonResponse({'MESSAGE' : 'INVALID_COORDINATE'}, status=400)
+
+            design_type = DesignType.objects.get(name=design_type)
+            upload_key  = str(uuid.uuid4()) + image.name
+            spool_path  = spool(image)
+
+            try:
+                with transaction.atomic():
+                    posting = Posting.objects.create(
+                        content     = content,
+                        image_url   = get_storage().url(upload_key),
+                        design_type = design_type,
+                        user        = user,
+                        status      = Posting.Status.PENDING
+                    )
+
+                    Tag.objects.bulk_create(
+                        Tag(
+                            coordinate = (x, y),
+                            x          = x,
+                            y          = y,
+                            posting    = posting,
+                            product    = Product.objects.get(id=tag['product_id'])
+                        ) for tag, (x, y) in zip(tags, coordinates)
+                    )
+
+                    transaction.on_commit(lambda: submit(posting.id, spool_path, upload_key, image.content_type))
+
+            except Exception:
+                os.remove(spool_path)
+                raise
 
             return JsonResponse({'MESSAGE' : 'POSTING_SUCCESS'}, status=200)
         
@@ -83,14 +95,21 @@ class BookmarkView(View):
         if not Posting.objects.filter(id=posting_id).exists():
             return JsonResponse({'MESSAGE' : 'POSTING_DOES_NOT_EXIST'}, status=400)
 
-        bookmark, flag = Bookmark.objects.get_or_create(
-            posting = Posting.objects.get(id=posting_id),
-            user    = request.user
-        )
+        with transaction.atomic():
+            lock_user(request.user.id)
 
-        if not flag:
-            bookmark.delete()
-            return JsonResponse({'MESSAGE' : 'BOOKMARK_DELETED'}, status=204)
+            bookmark, flag = Bookmark.objects.get_or_create(
+                posting = Posting.objects.get(id=posting_id),
+                user    = request.user
+            )
+
+            if not flag:
+                bookmark.delete()
+                Posting.objects.filter(id=posting_id, bookmark_count__gt=0).update(bookmark_count=F('bookmark_count') - 1)
+                return JsonResponse({'MESSAGE' : 'BOOKMARK_DELETED'}, status=204)
+
+            Posting.objects.filter(id=posting_id).update(bookmark_count=F('bookmark_count') + 1)
+            record_postings('bookmark', [posting_id])
         
         return JsonResponse({'MESSAGE' : 'BOOKMARK_CREATED'}, status=201)
 
@@ -98,15 +117,68 @@ class BookmarkView(View):
     def get(self, request):
         user = request.user
 
-        bookmarks = Bookmark.objects.select_related('posting', 'posting__user').filter(user_id=user.id)
+        bookmarks = Bookmark.objects.select_related('posting', 'posting__user').filter(user_id=user.id).order_by('id')
+
+        def bookmark_list():
+            for chunk in chunked(bookmarks.iterator(chunk_size=settings.STREAMING_CHUNK_SIZE), settings.STREAMING_CHUNK_SIZE):
+                rows = [{
+                    'posting_id'       : bookmark.posting.id,
+                    'posting_user_id'  : bookmark.posting.user_id,
+                    'posting_username' : bookmark.posting.user.nickname,
+                    'posting_image_url': bookmark.posting.image_url,
+                } for bookmark in chunk ]
+
+                viewer_state = ViewerState(user, author_ids=[row['posting_user_id'] for row in rows])
+                yield from viewer_state.annotate(rows, posting_key=None, author_key='posting_user_id')
+
+        return StreamingJsonResponse('LIST', bookmark_list(), status=200)
+
+class BookmarkBatchView(View):
+    @SignInDecorator
+    def post(self, request):
+        try:
+            add, remove = get_batch_ids(json.loads(request.body))
+
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'MESSAGE' : 'INVALID_IDS'}, status=400)
+
+        if not add and not remove:
+            return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status=400)
+
+        if len(add) + len(remove) > settings.BATCH_MUTATION_MAX_IDS:
+            return JsonResponse({'MESSAGE' : 'TOO_MANY_IDS'}, status=400)
+
+        user = request.user
+
+        with transaction.atomic():
+            lock_user(user.id)
+
+            existing   = set(Posting.objects.filter(id__in=add).values_list('id', flat=True))
+            bookmarked = set(Bookmark.objects.filter(user_id=user.id, posting_id__in=add + remove).values_list('posting_id', flat=True))
+            created    = [posting_id for posting_id in add if posting_id in existing and posting_id not in bookmarked]
+            deleted    = [posting_id for posting_id in remove if posting_id in bookmarked]
+
+            if created:
+                Bookmark.objects.bulk_create([Bookmark(user_id=user.id, posting_id=posting_id) for posting_id in created], ignore_conflicts=True)
+                Posting.objects.filter(id__in=created).update(bookmark_count=F('bookmark_count') + 1)
+                record_postings('bookmark', created)
+
+            if deleted:
+                Bookmark.objects.filter(user_id=user.id, posting_id__in=deleted).delete()
+                Posting.objects.filter(id__in=deleted, bookmark_count__gt=0).update(bookmark_count=F('bookmark_count') - 1)
+
+        results = {posting_id : 'BOOKMARK_CREATED' for posting_id in created}
+        results.update({posting_id : 'BOOKMARK_DELETED' for posting_id in deleted})
 
-        bookmark_list = [{
-            'posting_id'       : bookmark.posting.id,
-            'posting_username' : bookmark.posting.user.nickname,
-            'posting_image_url': bookmark.posting.image_url,
-        } for bookmark in bookmarks ]
+        result = [{
+            'posting_id' : posting_id,
+            'result'     : results.get(posting_id) or ('ALREADY_BOOKMARKED' if posting_id in bookmarked else 'POSTING_DOES_NOT_EXIST')
+        } for posting_id in add] + [{
+            'posting_id' : posting_id,
+            'result'     : results.get(posting_id, 'BOOKMARK_DOES_NOT_EXIST')
+        } for posting_id in remove]
 
-        return JsonResponse({'LIST' : bookmark_list}, status=200)
+        return JsonResponse({'RESULT' : result}, status=200)
 
 class CommentView(View):
     @SignInDecorator
@@ -117,11 +189,14 @@ class CommentView(View):
 
             data = json.loads(request.body)
 
-            Comment.objects.create(
-                content = data['content'],
-                user = request.user,
-                posting_id = posting_id
-            )
+            with transaction.atomic():
+                Comment.objects.create(
+                    content = data['content'],
+                    user = request.user,
+                    posting_id = posting_id
+                )
+                Posting.objects.filter(id=posting_id).update(comment_count=F('comment_count') + 1)
+                bump_version(id=posting_id)
 
             return JsonResponse({'MESSAGE' : 'COMMENT_CREATED'}, status=200)
 
@@ -137,103 +212,98 @@ class CommentView(View):
         Comment.objects.filter(id=comment_id).update(
             content = data['content']
         )
+        bump_version(comment__id=comment_id)
 
         return JsonResponse({'MESSAGE' : 'COMMENT_EDITED'}, status=200)
 
     def delete(self, request, comment_id):
-        if not Comment.objects.filter(id=comment_id).exists():
+        comment = Comment.objects.filter(id=comment_id).only('id', 'posting_id').first()
+
+        if not comment:
             return JsonResponse({'MESSAGE' : 'COMMENT_DOES_NOT_EXIST'})
 
-        Comment.objects.filter(id=comment_id).delete()
+        with transaction.atomic():
+            comment.delete()
+            Posting.objects.filter(id=comment.posting_id, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+            bump_version(id=comment.posting_id)
 
         return JsonResponse({'MESSAGE' : 'COMMENT_DELETED'}, status=200)
 
+class CommentListView(View):
+    def get(self, request, posting_id):
+        if not Posting.objects.filter(id=posting_id).exists():
+            return JsonResponse({'MESSAGE' : 'POSTING_DOES_NOT_EXIST'}, status=400)
+
+        comments = Comment.objects.select_related('user').filter(posting_id=posting_id)
+
+        try:
+            comments, next_cursor = keyset_page(comments, request.GET.get('cursor'), get_limit(request, settings.COMMENT_PAGE_SIZE))
+
+        except ValueError:
+            return JsonResponse({'MESSAGE' : 'INVALID_CURSOR'}, status=400)
+
+        return JsonResponse({
+            'COMMENTS'   : [serialize_comment(comment) for comment in comments],
+            'HAS_NEXT'   : next_cursor is not None,
+            'NEXT_CURSOR': next_cursor
+            })
+
 class PostingFeedPublicView(View):
     def get(self, request):
+        postings = Posting.objects.filter(status=Posting.Status.READY).only('id', 'created_at', 'cache_version', 'comment_count', 'bookmark_count')
+
+        if 'cursor' in request.GET or 'limit' in request.GET:
+            try:
+                postings, next_cursor = keyset_page(postings, request.GET.get('cursor'), get_limit(request))
+
+            except ValueError:
+                return JsonResponse({'MESSAGE' : 'INVALID_CURSOR'}, status=400)
+
+            return JsonResponse({
+                'POSTING_FEED': get_fragments(postings),
+                'HAS_NEXT'    : next_cursor is not None,
+                'NEXT_CURSOR' : next_cursor
+                })
+
         page      = int(request.GET.get('page', 1))
-        postings  = Posting.objects.select_related('user').prefetch_related('comment_set', 'comment_set__user', 'tag_set', 'tag_set__product').order_by('-created_at')
-
-        feed = [{
-            'feedId'    : posting.id,
-            'feeduserId': posting.user.id,
-            'feedUserName' : posting.user.nickname,
-            'src'       : posting.image_url,
-            'content'   : posting.content,
-            'postedDate': str(posting.created_at)[:10],
-            'designType': posting.design_type_id,
-            'comment'   : [{
-                'id'       : comment.id,
-                'content'  : comment.content,
-                'date'     : str(comment.created_at)[:10],
-                'user_name': comment.user.nickname
-            } for comment in posting.comment_set.all()],
-            'tags' : [{
-                'id'           : tag.id,
-                'product_id'   : tag.product.id,
-                'xx'           : int(tag.coordinate.lstrip('(').rstrip(')').split(',')[0]),
-                'yy'           : int(tag.coordinate.lstrip('(').rstrip(')').split(',')[1]),
-                'product_title': tag.product.product_name,
-                'product_price': round(tag.product.price),
-                'thumbnail_url': tag.product.thumbnail_url
-            } for tag in posting.tag_set.all()],
-            'follow'  : False,
-            'bookmark': False
-        } for posting in postings ]
-
-        paginator = Paginator(feed, 5)
-        pages     = paginator.get_page(page).object_list
-        has_next  = paginator.get_page(page).has_next()
+        paginator = Paginator(postings.order_by('-created_at', '-id'), settings.FEED_PAGE_SIZE)
+        pages     = paginator.get_page(page)
 
         return JsonResponse({
-            'POSTING_FEED': pages,
-            'HAS_NEXT'    : has_next
+            'POSTING_FEED': get_fragments(list(pages.object_list)),
+            'HAS_NEXT'    : pages.has_next()
             })
 
 class PostingFeedPrivateView(View):
     @SignInDecorator
     @query_debugger
     def get(self, request):
-        page      = int(request.GET.get('page', 1))
-        user      = request.user
-        bookmarks = Bookmark.objects.filter(user_id=user.id)
-        followers = Follow.objects.filter(follower_id=user.id)
-        postings  = Posting.objects.select_related('user').prefetch_related('comment_set',\
-                    'comment_set__user', 'tag_set', 'tag_set__product', Prefetch('bookmark_set',\
-                    queryset=bookmarks), Prefetch('user__followed',queryset=followers)).\
-                    order_by('-created_at')
-
-        feed = [{
-            'feedId'      : posting.id,
-            'feeduserId'  : posting.user.id,
-            'feedUserName': posting.user.nickname,
-            'src'         : posting.image_url,
-            'content'     : posting.content,
-            'postedDate'  : str(posting.created_at)[:10],
-            'designType'  : posting.design_type_id,
-            'comment'     : [{
-                'id'       : comment.id,
-                'content'  : comment.content,
-                'date'     : str(comment.created_at)[:10],
-                'user_name': comment.user.nickname
-            } for comment in posting.comment_set.all()],
-            'tags' : [{
-                'id'           : tag.id,
-                'product_id'   : tag.product.id,
-                'xx'           : int(tag.coordinate.lstrip('(').rstrip(')').split(',')[0]),
-                'yy'           : int(tag.coordinate.lstrip('(').rstrip(')').split(',')[1]),
-                'product_title': tag.product.product_name,
-                'product_price': round(tag.product.price),
-                'thumbnail_url': tag.product.thumbnail_url
-            } for tag in posting.tag_set.all()],
-            'follow'  : posting.user.followed.exists(),
-            'bookmark': posting.bookmark_set.exists()
-        } for posting in postings ]
-
-        paginator = Paginator(feed, 5)
-        pages     = paginator.get_page(page).object_list
-        has_next  = paginator.get_page(page).has_next()
+        user = request.user
+
+        try:
+            limit = get_limit(request)
+
+            if 'cursor' in request.GET:
+                posting_ids, next_cursor = timeline_page(user.id, limit, cursor=request.GET['cursor'])
+            else:
+                page = int(request.GET.get('page', 1))
+                posting_ids, next_cursor = timeline_page(user.id, limit, offset=(max(page, 1) - 1) * limit)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE' : 'INVALID_CURSOR'}, status=400)
+
+        postings = Posting.objects.only('id', 'cache_version', 'comment_count', 'bookmark_count').in_bulk(posting_ids)
+        feed     = get_fragments([postings[posting_id] for posting_id in posting_ids if posting_id in postings])
+
+        viewer_state = ViewerState(
+            user,
+            posting_ids = [posting['feedId'] for posting in feed],
+            author_ids  = [posting['feeduserId'] for posting in feed]
+        )
+        viewer_state.annotate(feed)
 
         return JsonResponse({
-            'POSTING_FEED': pages,
-            'HAS_NEXT'    : has_next
-            })
\ No newline at end of file
+            'POSTING_FEED': feed,
+            'HAS_NEXT'    : next_cursor is not None,
+            'NEXT_CURSOR' : next_cursor
+            })
@@ -0,0 +1,106 @@
+from django.conf       import settings
+from django.core.cache import caches
+from django.db         import transaction
+from django.db.models  import F, Prefetch
+
+from metrics              import cache_stats
+from products.models      import Product, ProductOption
+from products.serializers import serialize_product_detail
+
+stats = cache_stats('product_details')
+
+
+def version_key(product_id):
+    return f'product:{product_id}:version'
+
+def stock_key(product_id):
+    return f'product:{product_id}:stock'
+
+def detail_key(product_id, version):
+    return f'product:{product_id}:v{version}'
+
+def forget_versions(product_ids):
+    keys = [version_key(product_id) for product_id in product_ids]
+
+    transaction.on_commit(lambda: caches[settings.PRODUCT_CACHE].delete_many(keys))
+
+def forget_stocks(product_ids):
+    keys = [stock_key(product_id) for product_id in product_ids]
+
+    transaction.on_commit(lambda: caches[settings.PRODUCT_CACHE].delete_many(keys))
+
+def get_stocks(product_id):
+    cache  = caches[settings.PRODUCT_CACHE]
+    stocks = cache.get(stock_key(product_id))
+
+    if stocks is None:
+        stocks = dict(ProductOption.objects.filter(product_id=product_id).values_list('id', 'stock'))
+        cache.set(stock_key(product_id), stocks, settings.PRODUCT_STOCK_TTL)
+
+    return stocks
+
+def bump_version(product_ids):
+    product_ids = set(product_ids)
+
+    Product.objects.filter(id__in=product_ids).update(cache_version=F('cache_version') + 1)
+    forget_versions(product_ids)
+
+def with_details(queryset):
+    return queryset.prefetch_related(
+        'productimage_set',
+        Prefetch('productoption_set', queryset=ProductOption.objects.select_related('color'))
+    )
+
+def get_version(product_id):
+    # The version key is per process unless PRODUCT_CACHE is a shared backend,
+    # so other workers may serve the previous version for up to its TTL.
+    cache   = caches[settings.PRODUCT_CACHE]
+    version = cache.get(version_key(product_id))
+
+    if version is None:
+        version = Product.objects.filter(id=product_id).values_list('cache_version', flat=True).first()
+
+        if version is not None:
+            cache.set(version_key(product_id), version, settings.PRODUCT_CACHE_VERSION_TTL)
+
+    return version
+
+def get_detail(product_id):
+    cache   = caches[settings.PRODUCT_CACHE]
+    version = get_version(product_id)
+
+    if version is None:
+        return None
+
+    detail = cache.get(detail_key(product_id, version))
+
+    if detail is not None:
+        stats.hit()
+
+    else:
+        stats.miss()
+
+        product = with_details(Product.objects.filter(id=product_id)).first()
+
+        if not product:
+            return None
+
+        options = product.productoption_set.all()
+        detail  = {
+            'version' : product.cache_version,
+            'options' : [option.id for option in options],
+            'body'    : serialize_product_detail(product),
+        }
+
+        cache.set(version_key(product_id), product.cache_version, settings.PRODUCT_CACHE_VERSION_TTL)
+        cache.set(detail_key(product_id, product.cache_version), detail)
+        cache.add(stock_key(product_id), {option.id : option.stock for option in options}, settings.PRODUCT_STOCK_TTL)
+
+    stocks = get_stocks(product_id)
+
+    for option_id, option in zip(detail['options'], detail['body']['product_option']):
+        option['product_stocks'] = stocks.get(option_id, 0)
+
+    detail['stocks'] = [stocks.get(option_id, 0) for option_id in detail['options']]
+
+    return detail
@@ -0,0 +1,14 @@
+from django.conf                 import settings
+from django.core.management.base import BaseCommand
+
+from products.search import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product name n-gram search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PRODUCT_SEARCH_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Indexed {rebuild(options["batch_size"])} products')
@@ -0,0 +1,26 @@
+from django.conf                 import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from products.trending import rebuild, renormalize
+
+
+class Command(BaseCommand):
+    help = 'Rebuild decayed trending-product scores from tags, bookmarks and purchases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--windows', nargs='+', default=list(settings.TRENDING_WINDOWS), help='Only rebuild these windows')
+        parser.add_argument('--renormalize', action='store_true', help='Only rescale windows whose epoch has grown too old')
+
+    def handle(self, *args, **options):
+        unknown = set(options['windows']) - set(settings.TRENDING_WINDOWS)
+
+        if unknown:
+            raise CommandError(f'Unknown trending windows: {", ".join(sorted(unknown))}')
+
+        for window in options['windows']:
+            if options['renormalize']:
+                rescaled = renormalize(window)
+                self.stdout.write(f'{window}: {"renormalized" if rescaled else "up to date"}')
+
+            else:
+                self.stdout.write(f'{window}: rebuilt {rebuild(window)} product scores')
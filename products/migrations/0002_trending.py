@@ -0,0 +1,44 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingWindow',
+            fields=[
+                ('name', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('epoch', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'trending_windows',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+                ('window', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.trendingwindow')),
+            ],
+            options={
+                'db_table': 'trending_scores',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['window', '-score'], name='trending_window_score_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='trendingscore',
+            unique_together={('window', 'product')},
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_cache_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=2)),
+                ('name_length', models.PositiveSmallIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='products.product')),
+            ],
+            options={
+                'db_table': 'product_tokens',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='producttoken',
+            index=models.Index(fields=['token', 'name_length', 'product'], name='product_tokens_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='producttoken',
+            unique_together={('token', 'product')},
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, transaction
+
+from products.search import tokenize
+
+BATCH_SIZE = 1000
+
+
+def reindex_product_tokens(apps, schema_editor):
+    Product      = apps.get_model('products', 'Product')
+    ProductToken = apps.get_model('products', 'ProductToken')
+    last_id      = 0
+
+    while True:
+        products = list(Product.objects.filter(id__gt=last_id).order_by('id').only('id', 'product_name')[:BATCH_SIZE])
+
+        if not products:
+            break
+
+        with transaction.atomic():
+            ProductToken.objects.filter(product_id__in=[product.id for product in products]).delete()
+            ProductToken.objects.bulk_create([
+                ProductToken(token=token, product_id=product.id, name_length=len(product.product_name))
+                for product in products
+                for token in tokenize(product.product_name)
+            ], batch_size=BATCH_SIZE)
+
+        last_id = products[-1].id
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('products', '0004_product_tokens'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_product_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_reindex_product_tokens'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='product',
+            name='updated_at',
+        ),
+    ]
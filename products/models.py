@@ -4,6 +4,7 @@ class Product(models.Model):
     product_name  = models.CharField(max_length=20)
     price         = models.DecimalField(max_digits=10, decimal_places=2)
     thumbnail_url = models.URLField(max_length=1000)
+    cache_version = models.PositiveIntegerField(default=1)
 
     class Meta:
         db_table = 'products'
@@ -27,4 +28,35 @@ class ProductOption(models.Model):
     stock   = models.PositiveIntegerField(default=0)
 
     class Meta:
-        db_table = 'product_options'
\ No newline at end of file
+        db_table = 'product_options'
+
+class TrendingWindow(models.Model):
+    name  = models.CharField(max_length=20, primary_key=True)
+    epoch = models.DateTimeField()
+
+    class Meta:
+        db_table = 'trending_windows'
+
+class TrendingScore(models.Model):
+    window  = models.ForeignKey('trendingwindow', on_delete=models.CASCADE)
+    product = models.ForeignKey('product', on_delete=models.CASCADE)
+    score   = models.FloatField(default=0)
+
+    class Meta:
+        db_table        = 'trending_scores'
+        unique_together = ('window', 'product')
+        indexes         = [
+            models.Index(fields=['window', '-score'], name='trending_window_score_idx'),
+        ]
+
+class ProductToken(models.Model):
+    token       = models.CharField(max_length=2)
+    product     = models.ForeignKey('product', on_delete=models.CASCADE)
+    name_length = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table        = 'product_tokens'
+        unique_together = ('token', 'product')
+        indexes         = [
+            models.Index(fields=['token', 'name_length', 'product'], name='product_tokens_rank_idx'),
+        ]
@@ -0,0 +1,79 @@
+import re, unicodedata
+
+from django.conf      import settings
+from django.db        import transaction
+from django.db.models import Exists, OuterRef
+
+from products.models import Product, ProductToken
+
+WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    return unicodedata.normalize('NFKC', text).casefold()
+
+def bigrams(word):
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+def tokenize(text):
+    words = WORD.findall(normalize(text))
+
+    # Bigrams of the joined words cover every per-word bigram and also match
+    # queries that space the name differently, e.g. '원목의자' for '원목 의자'.
+    return list(dict.fromkeys([*''.join(words), *bigrams(''.join(words))]))
+
+def query_terms(text):
+    terms = []
+
+    for word in WORD.findall(normalize(text)):
+        terms.extend(bigrams(word) or [word])
+
+    return list(dict.fromkeys(terms))
+
+def index(products):
+    products = list(products)
+
+    with transaction.atomic():
+        ProductToken.objects.filter(product_id__in=[product.id for product in products]).delete()
+        ProductToken.objects.bulk_create([
+            ProductToken(token=token, product_id=product.id, name_length=len(product.product_name))
+            for product in products
+            for token in tokenize(product.product_name)
+        ], batch_size=settings.PRODUCT_SEARCH_BATCH_SIZE)
+
+def rebuild(batch_size):
+    last_id = 0
+    indexed = 0
+
+    while True:
+        products = list(Product.objects.filter(id__gt=last_id).order_by('id').only('id', 'product_name')[:batch_size])
+
+        if not products:
+            return indexed
+
+        index(products)
+
+        indexed += len(products)
+        last_id  = products[-1].id
+
+def frequency(term):
+    return ProductToken.objects.filter(token=term)[:settings.PRODUCT_SEARCH_FREQUENCY_CAP].count()
+
+def search(query, limit, offset=0):
+    terms = query_terms(query)
+
+    if not terms:
+        return [], False
+
+    if len(terms) > 1:
+        terms.sort(key=frequency)
+
+    matches = ProductToken.objects.filter(token=terms[0])
+
+    for term in terms[1:]:
+        matches = matches.filter(Exists(ProductToken.objects.filter(token=term, product_id=OuterRef('product_id'))))
+
+    product_ids = list(matches.order_by('name_length', 'product_id').values_list('product_id', flat=True)[offset:offset + limit + 1])
+    products    = Product.objects.in_bulk(product_ids[:limit])
+
+    return [products[product_id] for product_id in product_ids[:limit] if product_id in products], len(product_ids) > limit
@@ -0,0 +1,23 @@
+def serialize_product(product):
+    return {
+        'product_id'    : product.id,
+        'product_title' : product.product_name,
+        'product_price' : round(product.price),
+        'url'           : product.thumbnail_url,
+    }
+
+def serialize_product_detail(product):
+    return {
+        'product_title' : product.product_name,
+        'product_price' : round(product.price),
+        'url'           : product.thumbnail_url,
+        'product_images': [
+            image.image_url for image in product.productimage_set.all()
+        ],
+        'product_option' : [
+            {
+                'color_name' :  product_option.color.name,
+                'product_stocks' : product_option.stock
+            } for product_option in product.productoption_set.all()
+        ]
+    }
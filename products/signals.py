@@ -0,0 +1,51 @@
+from django.db.models         import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch          import receiver
+
+from postings.fragments import bump_version as bump_posting_versions
+from products.details   import bump_version, forget_versions, forget_stocks
+from products.models    import Product, ProductImage, ProductOption
+from products.search    import index
+
+
+@receiver(pre_save, sender=Product)
+def product_saving(sender, instance, update_fields, **kwargs):
+    instance._name_changed = instance._state.adding
+
+    if not instance._state.adding and (update_fields is None or 'product_name' in update_fields):
+        instance._name_changed = not Product.objects.filter(id=instance.id, product_name=instance.product_name).exists()
+
+    if not instance._state.adding and (update_fields is None or 'cache_version' in update_fields):
+        instance.cache_version = F('cache_version') + 1
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    if not isinstance(instance.cache_version, int):
+        instance.refresh_from_db(fields=['cache_version'])
+        forget_versions([instance.id])
+
+    elif not created:
+        bump_version([instance.id])
+        instance.refresh_from_db(fields=['cache_version'])
+
+    if not created:
+        bump_posting_versions(tag__product_id=instance.id)
+
+    if instance._name_changed:
+        index([instance])
+
+@receiver(pre_delete, sender=Product)
+def product_deleting(sender, instance, **kwargs):
+    bump_posting_versions(tag__product_id=instance.id)
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    forget_versions([instance.id])
+
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductOption)
+def product_part_changed(sender, instance, **kwargs):
+    bump_version([instance.product_id])
+
+    if sender is ProductOption:
+        forget_stocks([instance.product_id])
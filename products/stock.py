@@ -0,0 +1,17 @@
+from django.db.models import F
+
+from products.details import forget_stocks
+from products.models  import ProductOption
+
+
+class OutOfStock(Exception):
+    pass
+
+
+def reserve(option, quantity):
+    reserved = ProductOption.objects.filter(id=option.id, stock__gte=quantity).update(stock=F('stock') - quantity)
+
+    if not reserved:
+        raise OutOfStock(option.id)
+
+    forget_stocks([option.product_id])
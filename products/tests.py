@@ -1,6 +1,23 @@
-from django.test import TestCase, Client
+import jwt, threading, time, unicodedata
 
-from .models import Product, ProductImage, ProductOption, Color
+from datetime import timedelta
+from io       import StringIO
+
+from django.conf            import settings
+from django.db              import connection, transaction, OperationalError
+from django.db.models       import F
+from django.test            import TestCase, TransactionTestCase, Client
+from django.core.management import call_command
+from django.utils           import timezone
+from django.core.cache      import caches
+
+from .models           import Product, ProductImage, ProductOption, Color, TrendingWindow, TrendingScore
+from products.stock    import reserve, OutOfStock
+from products.details  import version_key
+from products.trending import record, record_postings, renormalize, top
+from postings.models   import Posting, DesignType, Tag
+from users.models      import User
+from my_settings       import SECRET_KEY, ALGORITHM
 
 class ProductDetailTest(TestCase):
     @classmethod
@@ -30,6 +47,9 @@ class ProductDetailTest(TestCase):
             product = Product.objects.get(id=1)
         )
 
+    def setUp(self):
+        caches[settings.PRODUCT_CACHE].clear()
+
     def tearDown(self):
         Product.objects.all().delete()
         ProductImage.objects.all().delete()
@@ -65,6 +85,407 @@ class ProductDetailTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'MESSAGE' : 'PRODUCT_DOES_NOT_EXIST'})
 
+class TrendingProductTest(TestCase):
+    def setUp(self):
+        User.objects.create(id=1, nickname='trend', kakao_id=1, kakao_email='trend@test.com')
+        DesignType.objects.create(id=1, name='거실')
+        Color.objects.create(id=1, name='검은색')
+
+        for i in range(1, 4):
+            Product.objects.create(id=i, product_name=f'의자{i}', price=1000 * i, thumbnail_url=f'https://homestagram.s3.abc/{i}')
+            ProductOption.objects.create(id=i, stock=10, color_id=1, product_id=i)
+
+        for i in range(1, 3):
+            Posting.objects.create(id=i, content=f'posting{i}', image_url=f'/posting{i}.png', user_id=1, design_type_id=1)
+            Tag.objects.create(posting_id=i, product_id=i, x=0, y=0)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                record_postings('tag', [i])
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def get_trending(self, **params):
+        response = Client().get('/products/trending', params)
+
+        self.assertEqual(response.status_code, 200)
+        return [(row['product_id'], row['score']) for row in response.json()['RESULT']]
+
+    def test_trending_follows_bookmarks_and_purchases(self):
+        client = Client()
+
+        self.assertEqual(self.get_trending(), [(2, 1.0), (1, 1.0)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/postings/2/bookmark', HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(self.get_trending()[0], (2, 3.0))
+
+        data = {
+            'product_id'   : 3,
+            'price'        : 3000,
+            'payerID'      : 'payer',
+            'paymentID'    : 'payment',
+            'paymentToken' : 'token'
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/users/purchase-history', data, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertEqual(self.get_trending(window='week'), [(3, 5.0), (2, 3.0), (1, 1.0)])
+
+    def test_older_events_decay(self):
+        now       = timezone.now()
+        half_life = settings.TRENDING_WINDOWS['day']
+
+        record('purchase', [1], now=now)
+        record('bookmark', [2], now=now + timedelta(seconds=half_life * 2))
+
+        ranking = top('day', 3, now=now + timedelta(seconds=half_life * 2))
+
+        self.assertEqual([product.id for product, _ in ranking], [2, 1])
+        self.assertAlmostEqual(ranking[0][1], 2 + 1 / 4, places=5)
+        self.assertAlmostEqual(ranking[1][1], 6 / 4, places=5)
+
+    def test_rebuild_matches_incremental_scores(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Client().post('/postings/1/bookmark', HTTP_AUTHORIZATION=self.token)
+
+        incremental = dict(TrendingScore.objects.filter(window_id='week').values_list('product_id', 'score'))
+        before      = {product.id : score for product, score in top('week', 10)}
+
+        call_command('rebuild_trending', stdout=StringIO())
+
+        after = {product.id : score for product, score in top('week', 10)}
+
+        self.assertEqual(set(incremental), set(after))
+
+        for product_id, score in before.items():
+            self.assertAlmostEqual(after[product_id], score, places=3)
+
+    def test_rebuild_counts_each_bookmark_once(self):
+        for i in range(2, 5):
+            User.objects.create(id=i, nickname=f'trend{i}', kakao_id=i, kakao_email=f'trend{i}@test.com')
+            Client().post('/postings/1/bookmark', HTTP_AUTHORIZATION=jwt.encode({'id': i}, SECRET_KEY, algorithm=ALGORITHM))
+
+        call_command('rebuild_trending', stdout=StringIO())
+
+        scores = {product.id : score for product, score in top('week', 10)}
+
+        self.assertAlmostEqual(scores[1], 1 + 2 * 3, places=3)
+        self.assertAlmostEqual(scores[2], 1, places=3)
+
+    def test_bookmark_records_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Client().post('/postings/1/bookmark', HTTP_AUTHORIZATION=self.token)
+
+            self.assertAlmostEqual(TrendingScore.objects.get(window_id='week', product_id=1).score, 1.0, places=3)
+
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+
+        self.assertAlmostEqual(TrendingScore.objects.get(window_id='week', product_id=1).score, 3.0, places=3)
+
+    def test_renormalize_keeps_scores(self):
+        TrendingWindow.objects.filter(name='day').update(epoch=timezone.now() - timedelta(seconds=settings.TRENDING_WINDOWS['day'] * 100))
+        TrendingScore.objects.filter(window_id='day').update(score=2.0 ** 100)
+        TrendingScore.objects.filter(window_id='day', product_id=2).update(score=2.0 ** 101)
+
+        self.assertTrue(renormalize('day'))
+
+        self.assertEqual([(product.id, round(score, 6)) for product, score in top('day', 10)], [(2, 2.0), (1, 1.0)])
+        self.assertLess(TrendingScore.objects.get(window_id='day', product_id=2).score, 3)
+        self.assertFalse(renormalize('day'))
+
+    def test_record_renormalizes_long_idle_window(self):
+        half_life = settings.TRENDING_WINDOWS['day']
+        now       = timezone.now()
+
+        TrendingWindow.objects.filter(name='day').update(epoch=now - timedelta(seconds=half_life * 2000))
+        TrendingScore.objects.filter(window_id='day').update(score=0)
+
+        record('purchase', [1], now=now)
+
+        self.assertEqual(TrendingWindow.objects.get(name='day').epoch, now)
+        self.assertEqual([(product.id, round(score, 6)) for product, score in top('day', 10, now=now)], [(1, 5.0)])
+
+    def test_top_renormalizes_long_idle_window(self):
+        half_life = settings.TRENDING_WINDOWS['day']
+        now       = timezone.now()
+
+        TrendingWindow.objects.filter(name='day').update(epoch=now - timedelta(seconds=half_life * 2000))
+
+        self.assertEqual(top('day', 10, now=now), [])
+
+    def test_trending_invalid_window(self):
+        response = Client().get('/products/trending', {'window': 'year'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'INVALID_WINDOW'})
+
+    def test_trending_invalid_limit(self):
+        response = Client().get('/products/trending', {'limit': 'abc'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'INVALID_LIMIT'})
+
+class ProductDetailCacheTest(TestCase):
+    def setUp(self):
+        caches[settings.PRODUCT_CACHE].clear()
+
+        Color.objects.create(id=1, name='검은색')
+        Product.objects.create(id=1, product_name='의자1', price=1000, thumbnail_url='https://homestagram.s3.abc')
+        ProductImage.objects.create(id=1, image_url='https://homestagram.s3.abc/1', product_id=1)
+        ProductOption.objects.create(id=1, stock=100, color_id=1, product_id=1)
+
+    def get_detail(self, **headers):
+        return Client().get('/products/1/detail', **headers)
+
+    def test_detail_miss_is_bounded_and_hit_is_free(self):
+        with self.assertNumQueries(4):
+            first = self.get_detail()
+
+        with self.assertNumQueries(0):
+            second = self.get_detail()
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_expired_version_is_read_from_the_product_row(self):
+        etag  = self.get_detail()['ETag']
+        cache = caches[settings.PRODUCT_CACHE]
+
+        with self.assertNumQueries(1):
+            cache.delete(version_key(1))
+            self.assertEqual(self.get_detail(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Product.objects.filter(id=1).update(product_name='의자B', cache_version=F('cache_version') + 1)
+        cache.delete(version_key(1))
+
+        response = self.get_detail(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['product_title'], '의자B')
+
+    def test_detail_conditional_get(self):
+        response = self.get_detail()
+
+        self.assertEqual(self.get_detail(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get_detail(HTTP_IF_NONE_MATCH='"product-1-v0"').status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+    def test_saving_same_instance_twice_never_reuses_a_version(self):
+        product = Product.objects.get(id=1)
+        etags   = [self.get_detail()['ETag']]
+
+        for name in ['의자B', '의자C']:
+            with self.captureOnCommitCallbacks(execute=True):
+                product.product_name = name
+                product.save()
+
+            response = self.get_detail(HTTP_IF_NONE_MATCH=etags[-1])
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['product_title'], name)
+            etags.append(response['ETag'])
+
+        self.assertEqual(len(set(etags)), 3)
+        self.assertEqual(product.cache_version, Product.objects.get(id=1).cache_version)
+
+    def test_detail_invalidated_when_product_parts_change(self):
+        etag = self.get_detail()['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            option = ProductOption.objects.get(id=1)
+            option.stock = 7
+            option.save()
+
+        response = self.get_detail(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['product_option'], [{'color_name': '검은색', 'product_stocks': 7}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.filter(id=1).delete()
+            Product.objects.filter(id=1).first().save()
+
+        self.assertEqual(self.get_detail().json()['product_images'], [])
+
+class ProductLookupTest(TestCase):
+    def setUp(self):
+        Color.objects.create(id=1, name='검은색')
+        Color.objects.create(id=2, name='흰색')
+
+        for i in range(1, 6):
+            Product.objects.create(id=i, product_name=f'의자{i}', price=1000 * i, thumbnail_url=f'https://homestagram.s3.abc/{i}')
+            ProductImage.objects.create(image_url=f'https://homestagram.s3.abc/{i}/1', product_id=i)
+            ProductOption.objects.create(stock=i, color_id=1, product_id=i)
+            ProductOption.objects.create(stock=i * 10, color_id=2, product_id=i)
+
+    def test_lookup_keeps_request_order_in_constant_queries(self):
+        with self.assertNumQueries(3):
+            response = Client().get('/products', {'ids' : '4,1,99,3,1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['product_id'] for row in response.json()['RESULT']], [4, 1, 3])
+        self.assertEqual(response.json()['NOT_FOUND'], [99])
+
+        with self.assertNumQueries(3):
+            Client().get('/products', {'ids' : '1,2,3,4,5'})
+
+    def test_lookup_matches_product_detail(self):
+        caches[settings.PRODUCT_CACHE].clear()
+
+        row    = Client().get('/products', {'ids' : '2'}).json()['RESULT'][0]
+        detail = Client().get('/products/2/detail').json()
+
+        self.assertEqual(row.pop('product_id'), 2)
+        self.assertEqual(row, detail)
+
+    def test_lookup_invalid_ids(self):
+        for params, message in [({}, 'KEY_ERROR'), ({'ids' : ''}, 'KEY_ERROR'), ({'ids' : '1,a'}, 'INVALID_IDS')]:
+            response = Client().get('/products', params)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'MESSAGE' : message})
+
+    def test_lookup_too_many_ids(self):
+        ids = ','.join(str(i) for i in range(1, settings.PRODUCT_LOOKUP_MAX_IDS + 2))
+
+        response = Client().get('/products', {'ids' : ids})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'TOO_MANY_IDS'})
+
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        for i, name in enumerate(['원목 의자', '북유럽 원목 흔들의자', 'Oak 식탁', '화이트 의자', '원목 책장'], start=1):
+            Product.objects.create(id=i, product_name=name, price=1000, thumbnail_url=f'https://homestagram.s3.abc/{i}')
+
+    def search(self, query, **params):
+        response = Client().get('/products/search', dict(params, q=query))
+
+        self.assertEqual(response.status_code, 200)
+        return [row['product_id'] for row in response.json()['RESULT']], response.json()['HAS_NEXT']
+
+    def test_search_ranks_shorter_names_first(self):
+        self.assertEqual(self.search('의자'), ([1, 4, 2], False))
+
+    def test_search_requires_every_term(self):
+        self.assertEqual(self.search('원목 의자'), ([1, 2], False))
+        self.assertEqual(self.search('원목 식탁'), ([], False))
+
+    def test_search_ignores_word_spacing(self):
+        self.assertEqual(self.search('원목의자'), ([1], False))
+        self.assertEqual(self.search('흔들 의자'), ([2], False))
+
+    def test_search_normalizes_korean_and_width(self):
+        self.assertEqual(self.search(unicodedata.normalize('NFD', '흔들의자')), ([2], False))
+        self.assertEqual(self.search('ＯＡＫ'), ([3], False))
+
+    def test_search_single_character(self):
+        self.assertEqual(self.search('장'), ([5], False))
+
+    def test_search_pages(self):
+        self.assertEqual(self.search('원목', limit=2), ([1, 5], True))
+        self.assertEqual(self.search('원목', limit=2, page=2), ([2], False))
+
+    def test_index_follows_product_writes(self):
+        product = Product.objects.get(id=3)
+        product.product_name = '원목 식탁'
+        product.save()
+
+        self.assertEqual(self.search('oak'), ([], False))
+        self.assertEqual(self.search('원목 식탁'), ([3], False))
+
+    def test_unchanged_name_is_not_reindexed(self):
+        product = Product.objects.get(id=3)
+        product.price = 2000
+
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(4):
+            product.save()
+
+        self.assertEqual(self.search('oak'), ([3], False))
+
+    def test_rebuild_search_index_command(self):
+        Product.objects.bulk_create([Product(id=6, product_name='라탄 의자', price=1000, thumbnail_url='https://homestagram.s3.abc/6')])
+        self.assertEqual(self.search('라탄'), ([], False))
+
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(self.search('라탄'), ([6], False))
+
+    def test_search_without_query(self):
+        response = Client().get('/products/search')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE' : 'KEY_ERROR'})
+
+    def test_search_rejects_oversized_queries(self):
+        for query in ['의' * 600, '원목의자흔들의자북유럽식탁']:
+            with self.assertNumQueries(0):
+                response = Client().get('/products/search', {'q' : query})
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'MESSAGE' : 'QUERY_TOO_LONG'})
+
+class StockReservationTest(TransactionTestCase):
+    def setUp(self):
+        caches[settings.PRODUCT_CACHE].clear()
+
+        Color.objects.create(id=1, name='검은색')
+        Product.objects.create(id=1, product_name='의자1', price=1000, thumbnail_url='https://homestagram.s3.abc')
+        ProductOption.objects.create(id=1, stock=5, color_id=1, product_id=1)
+
+    def buy(self, option, quantity, results, barrier):
+        barrier.wait()
+
+        try:
+            while True:
+                try:
+                    with transaction.atomic():
+                        reserve(option, quantity)
+
+                    results.append(True)
+                    return
+
+                except OutOfStock:
+                    results.append(False)
+                    return
+
+                except OperationalError:
+                    time.sleep(0.001)
+
+        finally:
+            connection.close()
+
+    def test_concurrent_buyers_never_oversell(self):
+        option  = ProductOption.objects.get(id=1)
+        results = []
+        barrier = threading.Barrier(32)
+        threads = [threading.Thread(target=self.buy, args=(option, 1, results, barrier)) for _ in range(32)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual((results.count(True), results.count(False)), (5, 27))
+        self.assertEqual(ProductOption.objects.get(id=1).stock, 0)
+
+    def test_reserve_rejects_more_than_stock_and_refreshes_detail_stock(self):
+        option  = ProductOption.objects.get(id=1)
+        version = Product.objects.get(id=1).cache_version
+        before  = Client().get('/products/1/detail')
+
+        with self.assertRaises(OutOfStock):
+            reserve(option, 6)
 
+        reserve(option, 5)
 
+        after = Client().get('/products/1/detail', HTTP_IF_NONE_MATCH=before['ETag'])
 
+        self.assertEqual(after.status_code, 200)
+        self.assertEqual(after.json()['product_option'][0]['product_stocks'], 0)
+        self.assertEqual(ProductOption.objects.get(id=1).stock, 0)
+        self.assertEqual(Product.objects.get(id=1).cache_version, version)
@@ -0,0 +1,151 @@
+import logging
+
+from collections import Counter, defaultdict
+from datetime    import timedelta
+
+from django.conf                import settings
+from django.db                  import transaction
+from django.db.models           import F
+from django.db.models.functions import Coalesce
+from django.utils               import timezone
+
+from products.models import ProductOption, TrendingWindow, TrendingScore
+from postings.models import Tag
+from users.models    import Bookmark, PurchaseHistory
+
+logger = logging.getLogger(__name__)
+
+
+def exponent(window, moment):
+    return (moment - window.epoch).total_seconds() / settings.TRENDING_WINDOWS[window.name]
+
+def growth(window, moment):
+    return 2 ** exponent(window, moment)
+
+def get_window(name, now):
+    TrendingWindow.objects.get_or_create(name=name, defaults={'epoch' : now})
+
+    return TrendingWindow.objects.select_for_update().get(name=name)
+
+def rescale(window, now):
+    TrendingScore.objects.filter(window=window).update(score=F('score') * 2 ** -exponent(window, now))
+
+    window.epoch = now
+    window.save(update_fields=['epoch'])
+
+def renormalize(name, now=None):
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        window = TrendingWindow.objects.select_for_update().filter(name=name).first()
+
+        if not window or exponent(window, now) <= settings.TRENDING_RENORMALIZE_AFTER:
+            return False
+
+        rescale(window, now)
+
+    return True
+
+def record(event, product_ids, now=None):
+    counts = Counter(product_id for product_id in product_ids if product_id)
+
+    if not counts:
+        return
+
+    now    = now or timezone.now()
+    weight = settings.TRENDING_WEIGHTS[event]
+    groups = defaultdict(list)
+
+    for product_id, count in counts.items():
+        groups[count].append(product_id)
+
+    with transaction.atomic():
+        for name in settings.TRENDING_WINDOWS:
+            window = get_window(name, now)
+
+            if exponent(window, now) > settings.TRENDING_RENORMALIZE_AFTER:
+                rescale(window, now)
+
+            TrendingScore.objects.bulk_create(
+                [TrendingScore(window=window, product_id=product_id) for product_id in counts],
+                ignore_conflicts=True
+            )
+
+            for count, group in groups.items():
+                TrendingScore.objects.filter(window=window, product_id__in=group).update(
+                    score=F('score') + weight * count * growth(window, now)
+                )
+
+def record_on_commit(event, product_ids):
+    now = timezone.now()
+
+    # The window rows are locked by every writer, so they are only taken once
+    # the caller's transaction has committed and never held across it.
+    def apply():
+        try:
+            record(event, product_ids, now=now)
+
+        except Exception:
+            logger.exception('Could not record %s for products %s', event, product_ids)
+
+    transaction.on_commit(apply)
+
+def record_postings(event, posting_ids):
+    record_on_commit(event, list(Tag.objects.filter(posting_id__in=posting_ids).values_list('product_id', flat=True)))
+
+def record_purchases(product_option_ids):
+    product_ids = dict(ProductOption.objects.filter(id__in=set(product_option_ids)).values_list('id', 'product_id'))
+
+    record_on_commit('purchase', [product_ids.get(option_id) for option_id in product_option_ids])
+
+def history(since):
+    tags = Tag.objects.filter(posting__created_at__gte=since).values_list('product_id', 'posting__created_at')
+
+    bookmarks = (
+        Bookmark.objects.annotate(bookmarked_at=Coalesce('created_at', 'posting__created_at'))
+            .filter(posting__tag__isnull=False, bookmarked_at__gte=since)
+            .values_list('posting__tag__product_id', 'bookmarked_at')
+    )
+
+    purchases = (
+        PurchaseHistory.objects.filter(purchased_time__gte=since)
+            .values_list('purchased_product__product_id', 'purchased_time')
+    )
+
+    for event, rows in [('tag', tags), ('bookmark', bookmarks), ('purchase', purchases)]:
+        for product_id, moment in rows.iterator():
+            yield event, product_id, moment
+
+def rebuild(name, now=None):
+    now       = now or timezone.now()
+    half_life = settings.TRENDING_WINDOWS[name]
+    window    = TrendingWindow(name=name, epoch=now)
+    scores    = defaultdict(float)
+
+    for event, product_id, moment in history(now - timedelta(seconds=half_life * settings.TRENDING_HORIZON)):
+        scores[product_id] += settings.TRENDING_WEIGHTS[event] * growth(window, moment)
+
+    with transaction.atomic():
+        window.save()
+        TrendingScore.objects.filter(window=window).delete()
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(window=window, product_id=product_id, score=score) for product_id, score in scores.items()],
+            batch_size=settings.TRENDING_BATCH_SIZE
+        )
+
+    return len(scores)
+
+def top(name, limit, now=None):
+    now    = now or timezone.now()
+    window = TrendingWindow.objects.filter(name=name).first()
+
+    if not window:
+        return []
+
+    if exponent(window, now) > settings.TRENDING_RENORMALIZE_AFTER and renormalize(name, now):
+        window.refresh_from_db()
+
+    decay  = growth(window, now)
+    scores = TrendingScore.objects.filter(window=window, score__gt=0).select_related('product').order_by('-score', 'product_id')[:limit]
+
+    return [(score.product, score.score / decay) for score in scores]
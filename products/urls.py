@@ -1,7 +1,10 @@
 from django.urls import path
 
-from products.views import ProductDetailView
+from products.views import ProductListView, ProductDetailView, TrendingProductView, ProductSearchView
 
 urlpatterns = [
-    path('/<int:product_id>/detail', ProductDetailView.as_view())
+    path('', ProductListView.as_view()),
+    path('/<int:product_id>/detail', ProductDetailView.as_view()),
+    path('/trending', TrendingProductView.as_view()),
+    path('/search', ProductSearchView.as_view()),
 ]
\ No newline at end of file
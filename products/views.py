@@ -1,28 +1,100 @@
-from django.http  import JsonResponse
-from django.views import View
+import zlib
 
-from products.models import Product, ProductImage, ProductOption
-from decorators      import query_debugger
+from django.conf        import settings
+from django.http        import JsonResponse
+from django.views       import View
+from django.utils.cache import get_conditional_response
+
+from products.details     import get_detail, with_details
+from products.models      import Product
+from products.serializers import serialize_product, serialize_product_detail
+from products.trending    import top
+from products.search      import search, query_terms
+from postings.utils       import get_limit
+from decorators           import query_debugger
+
+class ProductListView(View):
+    def get(self, request):
+        try:
+            product_ids = list(dict.fromkeys(int(product_id) for product_id in request.GET['ids'].split(',') if product_id))
+
+        except KeyError:
+            return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status=400)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE' : 'INVALID_IDS'}, status=400)
+
+        if not product_ids:
+            return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status=400)
+
+        if len(product_ids) > settings.PRODUCT_LOOKUP_MAX_IDS:
+            return JsonResponse({'MESSAGE' : 'TOO_MANY_IDS'}, status=400)
+
+        products = with_details(Product.objects.all()).in_bulk(product_ids)
+
+        return JsonResponse({
+            'RESULT'    : [
+                dict(product_id=product_id, **serialize_product_detail(products[product_id]))
+                for product_id in product_ids if product_id in products
+            ],
+            'NOT_FOUND' : [product_id for product_id in product_ids if product_id not in products]
+        }, status=200)
 
 class ProductDetailView(View):
     @query_debugger
     def get(self, request, product_id):
-        if not Product.objects.filter(id=product_id).exists():
+        detail = get_detail(product_id)
+
+        if not detail:
             return JsonResponse({'MESSAGE' : 'PRODUCT_DOES_NOT_EXIST'}, status=400)
 
-        product = Product.objects.prefetch_related('productimage_set', 'productoption_set', 'productoption_set__color').get(id=product_id) 
-        
+        etag     = f'"product-{product_id}-v{detail["version"]}-s{zlib.crc32(repr(detail["stocks"]).encode()):x}"'
+        response = get_conditional_response(request, etag=etag) or JsonResponse(detail['body'])
+
+        response['ETag'] = etag
+
+        return response
+
+class TrendingProductView(View):
+    def get(self, request):
+        window = request.GET.get('window', next(iter(settings.TRENDING_WINDOWS)))
+
+        if window not in settings.TRENDING_WINDOWS:
+            return JsonResponse({'MESSAGE' : 'INVALID_WINDOW'}, status=400)
+
+        try:
+            limit = get_limit(request, settings.TRENDING_SIZE)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE' : 'INVALID_LIMIT'}, status=400)
+
+        result = [
+            dict(serialize_product(product), score=round(score, 4))
+            for product, score in top(window, limit)
+        ]
+
+        return JsonResponse({'WINDOW' : window, 'RESULT' : result}, status=200)
+
+class ProductSearchView(View):
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+
+        if not query:
+            return JsonResponse({'MESSAGE' : 'KEY_ERROR'}, status=400)
+
+        if len(query) > settings.PRODUCT_SEARCH_MAX_QUERY_LENGTH or len(query_terms(query)) > settings.PRODUCT_SEARCH_MAX_TERMS:
+            return JsonResponse({'MESSAGE' : 'QUERY_TOO_LONG'}, status=400)
+
+        try:
+            limit = get_limit(request, settings.PRODUCT_SEARCH_PAGE_SIZE)
+            page  = max(int(request.GET.get('page', 1)), 1)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE' : 'INVALID_PAGE'}, status=400)
+
+        products, has_next = search(query, limit, (page - 1) * limit)
+
         return JsonResponse({
-            'product_title' : product.product_name,
-            'product_price' : round(product.price),
-            'url'           : product.thumbnail_url,
-            'product_images': [
-                image.image_url for image in product.productimage_set.all()
-            ],
-            'product_option' : [
-                {
-                    'color_name' :  product_option.color.name,
-                    'product_stocks' : product_option.stock
-                } for product_option in product.productoption_set.all()
-            ]
-        })
\ No newline at end of file
+            'RESULT'   : [serialize_product(product) for product in products],
+            'HAS_NEXT' : has_next
+        }, status=200)
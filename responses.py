@@ -0,0 +1,37 @@
+import json
+
+from itertools import islice
+
+from django.conf                  import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http                  import StreamingHttpResponse
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, size))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+def iter_json(key, rows, chunk_size):
+    yield '{' + json.dumps(key) + ': ['
+
+    separator = ''
+
+    for chunk in chunked(rows, chunk_size):
+        yield separator + ', '.join(json.dumps(row, cls=DjangoJSONEncoder) for row in chunk)
+        separator = ', '
+
+    yield ']}'
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    def __init__(self, key, rows, chunk_size=None, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+
+        super().__init__(iter_json(key, rows, chunk_size or settings.STREAMING_CHUNK_SIZE), **kwargs)
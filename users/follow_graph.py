@@ -0,0 +1,153 @@
+import bisect, threading, time
+
+from array import array
+
+from django.conf import settings
+
+from users.models import Follow
+
+
+def _contains(ids, user_id):
+    index = bisect.bisect_left(ids, user_id)
+
+    return index < len(ids) and ids[index] == user_id
+
+
+class FollowGraph:
+    load_attempts = 3
+
+    def __init__(self, max_age=None):
+        self.max_age    = max_age
+        self.outgoing   = {}
+        self.incoming   = {}
+        self._mutations = {'outgoing' : {}, 'incoming' : {}}
+        self._lock      = threading.Lock()
+
+    def _fresh(self, entry, now):
+        return entry is not None and (self.max_age is None or now - entry[0] < self.max_age)
+
+    def _load(self, name, user_ids, column, other):
+        table     = getattr(self, name)
+        mutations = self._mutations[name]
+        now       = time.monotonic()
+        result    = {}
+        missing   = []
+
+        for user_id in user_ids:
+            entry = table.get(user_id)
+
+            if self._fresh(entry, now):
+                result[user_id] = entry[1]
+            else:
+                missing.append(user_id)
+
+        for attempt in range(self.load_attempts):
+            if not missing:
+                break
+
+            with self._lock:
+                seen = {user_id : mutations.get(user_id, 0) for user_id in missing}
+
+            loaded = {user_id : array('q') for user_id in missing}
+
+            rows = (
+                Follow.objects.filter(**{column + '__in' : missing})
+                    .order_by(column, other)
+                    .values_list(column, other)
+            )
+
+            for user_id, other_id in rows.iterator():
+                loaded[user_id].append(other_id)
+
+            # An add or remove that lands while the query runs may not be in
+            # its snapshot, so those users are read again instead of stored.
+            with self._lock:
+                missing = [user_id for user_id in missing if mutations.get(user_id, 0) != seen[user_id]]
+
+                for user_id, ids in loaded.items():
+                    if user_id not in missing:
+                        table[user_id] = (now, ids)
+
+            if attempt < self.load_attempts - 1:
+                loaded = {user_id : ids for user_id, ids in loaded.items() if user_id not in missing}
+
+            result.update(loaded)
+
+        return result
+
+    def followings_many(self, user_ids):
+        return self._load('outgoing', set(user_ids), 'follower_id', 'followed_id')
+
+    def followers_many(self, user_ids):
+        return self._load('incoming', set(user_ids), 'followed_id', 'follower_id')
+
+    def followings(self, user_id):
+        return self.followings_many([user_id])[user_id]
+
+    def followers(self, user_id):
+        return self.followers_many([user_id])[user_id]
+
+    def is_following(self, user_id, other_id):
+        return _contains(self.followings(user_id), other_id)
+
+    def following_any(self, user_id, other_ids):
+        followings = self.followings(user_id)
+
+        return {other_id for other_id in other_ids if _contains(followings, other_id)}
+
+    def mutuals(self, user_id):
+        followers = self.followers(user_id)
+
+        return [other_id for other_id in self.followings(user_id) if _contains(followers, other_id)]
+
+    def _update(self, name, user_id, other_id, add):
+        table     = getattr(self, name)
+        mutations = self._mutations[name]
+
+        with self._lock:
+            mutations[user_id] = mutations.get(user_id, 0) + 1
+            entry              = table.get(user_id)
+
+            if entry is None:
+                return
+
+            ids   = array('q', entry[1])
+            index = bisect.bisect_left(ids, other_id)
+            found = index < len(ids) and ids[index] == other_id
+
+            if add and not found:
+                ids.insert(index, other_id)
+            elif not add and found:
+                del ids[index]
+
+            table[user_id] = (entry[0], ids)
+
+    def add(self, follower_id, followed_id):
+        self._update('outgoing', follower_id, followed_id, True)
+        self._update('incoming', followed_id, follower_id, True)
+
+    def remove(self, follower_id, followed_id):
+        self._update('outgoing', follower_id, followed_id, False)
+        self._update('incoming', followed_id, follower_id, False)
+
+    def clear(self):
+        with self._lock:
+            self.outgoing.clear()
+            self.incoming.clear()
+
+
+_graph      = None
+_graph_lock = threading.Lock()
+
+
+def get_follow_graph():
+    global _graph
+
+    if not settings.FOLLOW_GRAPH_ENABLED:
+        return None
+
+    with _graph_lock:
+        if _graph is None:
+            _graph = FollowGraph(max_age=settings.FOLLOW_GRAPH_MAX_AGE)
+
+        return _graph
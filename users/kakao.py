@@ -0,0 +1,125 @@
+import hashlib, threading, time, requests
+
+from requests.adapters import HTTPAdapter
+
+from django.conf       import settings
+from django.core.cache import caches
+
+from metrics import cache_stats
+
+stats = cache_stats('kakao_tokens')
+
+
+class KakaoUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.failures          = 0
+        self.opened_at         = None
+        self._lock             = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures  = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class KakaoClient:
+    def __init__(self, base_url, connect_timeout, read_timeout, pool_size, breaker, cache=None, cache_ttl=0):
+        self.base_url  = base_url.rstrip('/')
+        self.timeout   = (connect_timeout, read_timeout)
+        self.breaker   = breaker
+        self.cache     = cache
+        self.cache_ttl = cache_ttl
+        self.session   = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def cache_key(self, access_token):
+        return 'kakao:' + hashlib.sha256(access_token.encode()).hexdigest()
+
+    def get_user_info(self, access_token):
+        if self.cache:
+            user_info = self.cache.get(self.cache_key(access_token))
+
+            if user_info:
+                stats.hit()
+                return user_info
+
+            stats.miss()
+
+        if not self.breaker.allow():
+            raise KakaoUnavailable('circuit open')
+
+        try:
+            response = self.session.get(
+                self.base_url + '/v2/user/me',
+                headers = {'Authorization' : f'Bearer {access_token}'},
+                timeout = self.timeout
+            )
+
+            if response.status_code >= 500:
+                raise KakaoUnavailable(response.status_code)
+
+            user_info = response.json()
+
+        except (requests.RequestException, ValueError, KakaoUnavailable) as error:
+            self.breaker.record_failure()
+            raise KakaoUnavailable(error)
+
+        self.breaker.record_success()
+
+        if self.cache and user_info.get('id'):
+            user_info = {
+                'id'           : user_info['id'],
+                'kakao_account': {'email' : user_info.get('kakao_account', {}).get('email')}
+            }
+            self.cache.set(self.cache_key(access_token), user_info, self.cache_ttl)
+
+        return user_info
+
+
+_client      = None
+_client_lock = threading.Lock()
+
+
+def get_kakao_client():
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = KakaoClient(
+                base_url        = settings.KAKAO_API_URL,
+                connect_timeout = settings.KAKAO_CONNECT_TIMEOUT,
+                read_timeout    = settings.KAKAO_READ_TIMEOUT,
+                pool_size       = settings.KAKAO_POOL_SIZE,
+                breaker         = CircuitBreaker(settings.KAKAO_BREAKER_THRESHOLD, settings.KAKAO_BREAKER_RESET),
+                cache           = caches[settings.KAKAO_TOKEN_CACHE],
+                cache_ttl       = settings.KAKAO_TOKEN_CACHE_TTL,
+            )
+
+        return _client
@@ -0,0 +1,63 @@
+import csv
+
+from django.conf                 import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils                import timezone
+from django.utils.dateparse      import parse_datetime
+
+from responses       import chunked
+from users.models    import PurchaseHistory
+from users.purchases import ingest
+
+
+class Command(BaseCommand):
+    help = 'Import purchases from a PayPal export CSV, skipping payment ids that are already recorded'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with user_id, product_option_id, quantity, price, payer_id, payment_id, payment_token and optional purchased_time columns')
+        parser.add_argument('--batch-size', type=int, default=settings.PURCHASE_INGEST_BATCH_SIZE)
+
+    def parse_time(self, value):
+        if not value:
+            return timezone.now()
+
+        purchased_time = parse_datetime(value)
+
+        if purchased_time is None:
+            raise ValueError(f'invalid purchased_time {value!r}')
+
+        if settings.USE_TZ and timezone.is_naive(purchased_time):
+            return timezone.make_aware(purchased_time)
+
+        if not settings.USE_TZ and timezone.is_aware(purchased_time):
+            return timezone.make_naive(purchased_time)
+
+        return purchased_time
+
+    def read(self, rows):
+        for line, row in enumerate(rows, start=2):
+            try:
+                yield PurchaseHistory(
+                    user_id              = int(row['user_id']),
+                    purchased_product_id = int(row['product_option_id']),
+                    purchased_quantity   = int(row['quantity']),
+                    purchased_price      = int(row['price']),
+                    purchased_time       = self.parse_time(row.get('purchased_time')),
+                    paypal_payer_id      = row['payer_id'],
+                    paypal_payment_id    = row['payment_id'],
+                    paypal_payment_token = row['payment_token'],
+                )
+
+            except (KeyError, ValueError) as error:
+                raise CommandError(f'line {line}: invalid row ({error})')
+
+    def handle(self, *args, **options):
+        total   = 0
+        created = 0
+
+        with open(options['path'], newline='') as export:
+            for batch in chunked(self.read(csv.DictReader(export)), options['batch_size']):
+                total   += len(batch)
+                created += ingest(batch)
+
+        self.stdout.write(f'Read {total} purchases, recorded {created}, skipped {total - created} already recorded')
@@ -0,0 +1,36 @@
+from django.conf                 import settings
+from django.core.management.base import BaseCommand
+
+from users.recommendations import refresh, stale_user_ids
+from users.models          import User
+
+
+class Command(BaseCommand):
+    help = 'Recompute who-to-follow recommendations for users whose list is missing or stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', nargs='+', type=int, help='Only refresh these user ids')
+        parser.add_argument('--all', action='store_true', help='Refresh every user, not only stale ones')
+        parser.add_argument('--batch-size', type=int, default=settings.RECOMMENDATION_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('id').values_list('id', flat=True) if options['all'] else stale_user_ids()
+
+        if options['users']:
+            user_ids = user_ids.filter(id__in=options['users'])
+
+        refreshed = 0
+        last_id   = 0
+
+        while True:
+            batch = list(user_ids.filter(id__gt=last_id)[:options['batch_size']])
+
+            if not batch:
+                break
+
+            refresh(batch)
+
+            refreshed += len(batch)
+            last_id    = batch[-1]
+
+        self.stdout.write(f'Refreshed recommendations for {refreshed} users')
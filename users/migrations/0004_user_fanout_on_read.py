@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_auto_20210825_1141'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='fanout_on_read',
+            field=models.BooleanField(default=False),
+        ),
+    ]
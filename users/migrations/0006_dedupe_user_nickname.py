@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def dedupe_nicknames(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+
+    duplicates = (
+        User.objects.filter(nickname__isnull=False)
+            .values('nickname')
+            .annotate(keep_id=Min('id'), users=Count('id'))
+            .filter(users__gt=1)
+    )
+
+    for duplicate in duplicates:
+        User.objects.filter(nickname=duplicate['nickname']).exclude(id=duplicate['keep_id']).update(nickname=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_nicknames, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_dedupe_user_nickname'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='nickname',
+            field=models.CharField(max_length=20, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def dedupe(model, fields):
+    duplicates = (
+        model.objects.values(*fields)
+            .annotate(keep_id=Min('id'), rows=Count('id'))
+            .filter(rows__gt=1)
+    )
+
+    for duplicate in duplicates:
+        model.objects.filter(**{field : duplicate[field] for field in fields}).exclude(id=duplicate['keep_id']).delete()
+
+def dedupe_bookmarks_follows(apps, schema_editor):
+    dedupe(apps.get_model('users', 'Bookmark'), ['user_id', 'posting_id'])
+    dedupe(apps.get_model('users', 'Follow'), ['follower_id', 'followed_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_follow_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_bookmarks_follows, migrations.RunPython.noop),
+    ]
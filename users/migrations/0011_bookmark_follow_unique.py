@@ -0,0 +1,22 @@
+# Generated by Django 3.2.6 on 2026-10-19 00:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postings', '0011_posting_status'),
+        ('users', '0010_dedupe_bookmarks_follows'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='bookmark',
+            unique_together={('user', 'posting')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='follow',
+            unique_together={('follower', 'followed')},
+        ),
+    ]
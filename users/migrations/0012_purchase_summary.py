@@ -0,0 +1,30 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_bookmark_follow_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='purchase_summary', serialize=False, to='users.user')),
+                ('total_spent', models.BigIntegerField(default=0)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('last_purchased_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'db_table': 'purchase_summaries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='purchasehistory',
+            index=models.Index(fields=['user', 'id'], name='purchases_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+from django.db.models import Count, F, Max, Sum
+
+BATCH_SIZE = 1000
+
+
+def backfill_purchase_summary(apps, schema_editor):
+    PurchaseHistory = apps.get_model('users', 'PurchaseHistory')
+    PurchaseSummary = apps.get_model('users', 'PurchaseSummary')
+
+    totals = (
+        PurchaseHistory.objects.values('user_id')
+            .annotate(
+                total_spent       = Sum(F('purchased_price') * F('purchased_quantity')),
+                order_count       = Count('id'),
+                last_purchased_at = Max('purchased_time'),
+            )
+            .order_by('user_id')
+    )
+
+    PurchaseSummary.objects.bulk_create(
+        (PurchaseSummary(**row) for row in totals.iterator()),
+        batch_size       = BATCH_SIZE,
+        ignore_conflicts = True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_purchase_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_purchase_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def dedupe_paypal_payment_id(apps, schema_editor):
+    PurchaseHistory = apps.get_model('users', 'PurchaseHistory')
+
+    duplicates = (
+        PurchaseHistory.objects.values('paypal_payment_id')
+            .annotate(keep_id=Min('id'), rows=Count('id'))
+            .filter(rows__gt=1)
+    )
+
+    for duplicate in duplicates:
+        purchases = PurchaseHistory.objects.filter(paypal_payment_id=duplicate['paypal_payment_id']).exclude(id=duplicate['keep_id'])
+
+        for purchase in purchases:
+            purchase.paypal_payment_id = f'{purchase.paypal_payment_id[:80]}:duplicate:{purchase.id}'
+            purchase.save(update_fields=['paypal_payment_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_backfill_purchase_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_paypal_payment_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_dedupe_paypal_payment_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchasehistory',
+            name='paypal_payment_id',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_paypal_payment_id_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookmark',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+    ]
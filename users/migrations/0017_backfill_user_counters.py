@@ -0,0 +1,41 @@
+from django.db                  import migrations, transaction
+from django.db.models           import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(model.objects.filter(**{field : OuterRef('id')}).order_by().values(field).annotate(count=Count('id')).values('count')), 0)
+
+def backfill_user_counters(apps, schema_editor):
+    User    = apps.get_model('users', 'User')
+    Follow  = apps.get_model('users', 'Follow')
+    last_id = 0
+
+    while True:
+        ids = list(User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE])
+
+        if not ids:
+            break
+
+        with transaction.atomic():
+            User.objects.filter(id__gt=last_id, id__lte=ids[-1]).update(
+                follower_count  = count_of(Follow, 'followed_id'),
+                following_count = count_of(Follow, 'follower_id')
+            )
+
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0016_bookmark_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.6 on 2026-10-19 02:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_backfill_user_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchasehistory',
+            name='purchased_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,10 +1,17 @@
-from django.db import models
+from django.db    import models
+from django.utils import timezone
 
 class User(models.Model):
-    nickname    = models.CharField(max_length=20, null=True)
+    nickname    = models.CharField(max_length=20, null=True, unique=True)
     kakao_id    = models.BigIntegerField()
     kakao_email = models.CharField(max_length=50)
 
+    fanout_on_read  = models.BooleanField(default=False)
+    follower_count  = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    recommendations_updated_at = models.DateTimeField(null=True)
+
     class Meta:
         db_table = 'users'
 
@@ -16,18 +23,37 @@ class Address(models.Model):
         db_table = 'addresses'
 
 class Bookmark(models.Model):
-    posting = models.ForeignKey('postings.posting', on_delete=models.CASCADE)
-    user    = models.ForeignKey('user', on_delete=models.CASCADE)
+    posting    = models.ForeignKey('postings.posting', on_delete=models.CASCADE)
+    user       = models.ForeignKey('user', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
 
     class Meta:
-        db_table = 'bookmarks'
+        db_table        = 'bookmarks'
+        unique_together = ('user', 'posting')
 
 class Follow(models.Model):
     follower = models.ForeignKey('user', on_delete=models.CASCADE, related_name='follower')
     followed = models.ForeignKey('user', on_delete=models.CASCADE, related_name='followed')
 
     class Meta:
-        db_table = 'follows'
+        db_table        = 'follows'
+        unique_together = ('follower', 'followed')
+        indexes         = [
+            models.Index(fields=['follower', 'id'], name='follows_follower_id_idx'),
+            models.Index(fields=['followed', 'id'], name='follows_followed_id_idx'),
+        ]
+
+class Recommendation(models.Model):
+    user      = models.ForeignKey('user', on_delete=models.CASCADE, related_name='recommendations')
+    candidate = models.ForeignKey('user', on_delete=models.CASCADE, related_name='+')
+    score     = models.PositiveIntegerField()
+
+    class Meta:
+        db_table        = 'recommendations'
+        unique_together = ('user', 'candidate')
+        indexes         = [
+            models.Index(fields=['user', '-score'], name='recommendations_user_score_idx')
+        ]
 
 class Cart(models.Model):
     user           = models.ForeignKey('user', on_delete=models.CASCADE)
@@ -42,10 +68,22 @@ class PurchaseHistory(models.Model):
     purchased_product    = models.ForeignKey('products.productoption', on_delete=models.DO_NOTHING)
     purchased_quantity   = models.IntegerField()
     purchased_price      = models.IntegerField()
-    purchased_time       = models.DateTimeField(auto_now_add=True)
+    purchased_time       = models.DateTimeField(default=timezone.now)
     paypal_payer_id      = models.CharField(max_length=50)
-    paypal_payment_id    = models.CharField(max_length=100)
+    paypal_payment_id    = models.CharField(max_length=100, unique=True)
     paypal_payment_token = models.CharField(max_length=200)
 
     class Meta:
         db_table = 'purchase_histories'
+        indexes  = [
+            models.Index(fields=['user', 'id'], name='purchases_user_id_idx'),
+        ]
+
+class PurchaseSummary(models.Model):
+    user              = models.OneToOneField('user', on_delete=models.CASCADE, primary_key=True, related_name='purchase_summary')
+    total_spent       = models.BigIntegerField(default=0)
+    order_count       = models.PositiveIntegerField(default=0)
+    last_purchased_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'purchase_summaries'
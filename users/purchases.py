@@ -0,0 +1,49 @@
+from django.db        import transaction
+from django.db.models import Count, F, Max, Sum
+
+from users.models       import PurchaseHistory, PurchaseSummary
+from products.trending import record_purchases
+
+
+def refresh_summaries(user_ids):
+    with transaction.atomic():
+        PurchaseSummary.objects.bulk_create([PurchaseSummary(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+
+        # Totals are read only once the rows are locked, so an increment
+        # committed by a concurrent purchase is either included or waits.
+        summaries = list(PurchaseSummary.objects.select_for_update().filter(user_id__in=user_ids).order_by('user_id'))
+        totals    = {
+            row['user_id'] : row for row in PurchaseHistory.objects.filter(user_id__in=user_ids)
+                .values('user_id')
+                .annotate(
+                    total_spent       = Sum(F('purchased_price') * F('purchased_quantity')),
+                    order_count       = Count('id'),
+                    last_purchased_at = Max('purchased_time'),
+                )
+                .order_by('user_id')
+        }
+
+        for summary in summaries:
+            row = totals.get(summary.user_id, {})
+
+            summary.total_spent       = row.get('total_spent') or 0
+            summary.order_count       = row.get('order_count', 0)
+            summary.last_purchased_at = row.get('last_purchased_at')
+
+        PurchaseSummary.objects.bulk_update(summaries, ['total_spent', 'order_count', 'last_purchased_at'])
+
+def ingest(purchases):
+    payment_ids = {purchase.paypal_payment_id for purchase in purchases}
+    existing    = set(PurchaseHistory.objects.filter(paypal_payment_id__in=payment_ids).values_list('paypal_payment_id', flat=True))
+    new         = {}
+
+    for purchase in purchases:
+        if purchase.paypal_payment_id not in existing:
+            new.setdefault(purchase.paypal_payment_id, purchase)
+
+    with transaction.atomic():
+        PurchaseHistory.objects.bulk_create(new.values(), ignore_conflicts=True)
+        refresh_summaries({purchase.user_id for purchase in new.values()})
+        record_purchases([purchase.purchased_product_id for purchase in new.values()])
+
+    return len(new)
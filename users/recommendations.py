@@ -0,0 +1,80 @@
+import heapq
+
+from collections import defaultdict
+from datetime    import timedelta
+
+from django.conf      import settings
+from django.db        import transaction
+from django.db.models import Count, F, Q
+from django.utils     import timezone
+
+from users.models import User, Follow, Bookmark, Recommendation
+
+
+def co_follow_counts(user_ids):
+    rows = (
+        Follow.objects.filter(follower__followed__follower_id__in=user_ids)
+            .annotate(viewer_id=F('follower__followed__follower_id'))
+            .exclude(followed_id=F('viewer_id'))
+            .values('viewer_id', 'followed_id')
+            .annotate(paths=Count('id'))
+            .values_list('viewer_id', 'followed_id', 'paths')
+    )
+
+    return rows.iterator()
+
+def co_bookmark_counts(user_ids):
+    rows = (
+        Bookmark.objects.filter(posting__bookmark__user_id__in=user_ids)
+            .annotate(viewer_id=F('posting__bookmark__user_id'))
+            .exclude(user_id=F('viewer_id'))
+            .values('viewer_id', 'user_id')
+            .annotate(shared=Count('posting_id', distinct=True))
+            .values_list('viewer_id', 'user_id', 'shared')
+    )
+
+    return rows.iterator()
+
+def score(user_ids):
+    scores     = defaultdict(lambda: defaultdict(int))
+    followings = defaultdict(set)
+
+    for follower_id, followed_id in Follow.objects.filter(follower_id__in=user_ids).values_list('follower_id', 'followed_id'):
+        followings[follower_id].add(followed_id)
+
+    for viewer_id, candidate_id, paths in co_follow_counts(user_ids):
+        scores[viewer_id][candidate_id] += paths * settings.RECOMMENDATION_FOLLOW_WEIGHT
+
+    for viewer_id, candidate_id, shared in co_bookmark_counts(user_ids):
+        scores[viewer_id][candidate_id] += shared * settings.RECOMMENDATION_BOOKMARK_WEIGHT
+
+    return {
+        user_id : heapq.nlargest(
+            settings.RECOMMENDATION_SIZE,
+            ((candidate_score, -candidate_id) for candidate_id, candidate_score in scores[user_id].items() if candidate_id not in followings[user_id]),
+        )
+        for user_id in user_ids
+    }
+
+def refresh(user_ids):
+    user_ids = list(user_ids)
+    now      = timezone.now()
+    top      = score(user_ids)
+
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create([
+            Recommendation(user_id=user_id, candidate_id=-negative_id, score=candidate_score)
+            for user_id, candidates in top.items()
+            for candidate_score, negative_id in candidates
+        ])
+        User.objects.filter(id__in=user_ids).update(recommendations_updated_at=now)
+
+def stale_user_ids():
+    cutoff = timezone.now() - timedelta(seconds=settings.RECOMMENDATION_MAX_AGE)
+
+    return (
+        User.objects.filter(Q(recommendations_updated_at__isnull=True) | Q(recommendations_updated_at__lt=cutoff))
+            .order_by('id')
+            .values_list('id', flat=True)
+    )
@@ -1,18 +1,33 @@
-import json, jwt
+import json, jwt, os, random, tempfile, time, threading, tracemalloc
+from http.server   import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io            import StringIO
+from unittest      import skipUnless
 from unittest.mock import patch, MagicMock
 
-from django.test import TestCase, Client
-from django.http import HttpRequest
+from django.test       import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db         import connection
+from django.db         import transaction, IntegrityError
+from django.core.cache import caches
+from django.core.management import call_command
+from django.http       import HttpRequest, JsonResponse
 
+from metrics              import add_hook, remove_hook
 from my_settings          import ALGORITHM 
 from homestagram.settings import SECRET_KEY
 from users.utils          import SignInDecorator
-from users.models         import User, Follow, PurchaseHistory
-from postings.models      import Posting, DesignType
+from users.kakao          import KakaoClient, CircuitBreaker, KakaoUnavailable
+from users.follow_graph   import FollowGraph
+from users.viewer_state   import ViewerState
+from users.purchases      import refresh_summaries
+from users.models         import User, Follow, Bookmark, PurchaseHistory, PurchaseSummary, Recommendation
+from postings.models      import Posting, DesignType, Timeline
 from products.models      import Product, Color, ProductOption
 
 class SignInDecoratorTest(TestCase):
     def setUp(self):
+        caches['users'].clear()
+
         self.users = User.objects.bulk_create([
             User(
                 id          = 1,
@@ -55,6 +70,22 @@ class SignInDecoratorTest(TestCase):
 
         self.assertEqual(json.loads(user_id(fake_request).content)['MESSAGE'],'NEED_NICKNAME')
 
+    def test_decorator_sees_nickname_set_without_invalidation(self):
+        access_token = jwt.encode({'id': self.users[1].id}, SECRET_KEY, algorithm=ALGORITHM)
+        
+        fake_request         = HttpRequest()
+        fake_request.headers = {'Authorization':access_token}
+
+        @SignInDecorator
+        def user_id(self, request):
+            return f'user_id is {request.user.id}'
+
+        self.assertEqual(json.loads(user_id(fake_request).content)['MESSAGE'],'NEED_NICKNAME')
+
+        User.objects.filter(id=self.users[1].id).update(nickname='late')
+
+        self.assertEqual(user_id(fake_request), f'user_id is {self.users[1].id}')
+
     def test_decorator_no_token(self):
         fake_request = HttpRequest()
 
@@ -64,6 +95,63 @@ class SignInDecoratorTest(TestCase):
 
         self.assertEqual(json.loads(user_id(fake_request).content)['MESSAGE'],'NEED_LOGIN')
 
+    def test_decorator_expired_token(self):
+        access_token = jwt.encode({'id': self.users[0].id, 'exp': int(time.time()) - 10}, SECRET_KEY, algorithm=ALGORITHM)
+
+        fake_request         = HttpRequest()
+        fake_request.headers = {'Authorization':access_token}
+
+        @SignInDecorator
+        def user_id(self, request):
+            return f'user_id is {request.user.id}'
+
+        self.assertEqual(json.loads(user_id(fake_request).content)['MESSAGE'],'EXPIRED_TOKEN')
+
+    def test_decorator_caches_signed_in_user(self):
+        access_token = jwt.encode({'id': self.users[0].id}, SECRET_KEY, algorithm=ALGORITHM)
+        events       = []
+
+        fake_request         = HttpRequest()
+        fake_request.headers = {'Authorization':access_token}
+
+        @SignInDecorator
+        def nickname(self, request):
+            return request.user.nickname
+
+        def hook(stats, event, count):
+            events.append((stats.name, event))
+
+        add_hook(hook)
+        self.addCleanup(remove_hook, hook)
+
+        self.assertEqual(nickname(fake_request), 'test')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(nickname(fake_request), 'test')
+
+        Client().post(f'/users/{self.users[0].id}/nickname', {'nickname': 'test9'}, content_type='application/json')
+
+        self.assertEqual(nickname(fake_request), 'test9')
+        self.assertEqual(events, [('signed_in_users', 'miss'), ('signed_in_users', 'hit'), ('signed_in_users', 'miss')])
+
+    @patch('users.utils.caches')
+    def test_decorator_cache_entry_ages_out_with_token(self, mocked_caches):
+        mocked_caches.__getitem__.return_value.get.return_value = None
+
+        access_token = jwt.encode({'id': self.users[0].id, 'exp': int(time.time()) + 30}, SECRET_KEY, algorithm=ALGORITHM)
+
+        fake_request         = HttpRequest()
+        fake_request.headers = {'Authorization':access_token}
+
+        @SignInDecorator
+        def user_id(self, request):
+            return request.user.id
+
+        user_id(fake_request)
+
+        timeout = mocked_caches.__getitem__.return_value.set.call_args[0][2]
+        self.assertTrue(0 < timeout <= 30)
+
     def test_decorator_invalid_token(self):
         fake_request         = HttpRequest()
         fake_request.headers = {'Authorization':'foobar'}
@@ -93,8 +181,8 @@ class SignInTest(TestCase):
     def tearDown(self):
         User.objects.all().delete()
 
-    @patch("users.views.requests")
-    def test_signin_existing_user_success(self, mocked_requests):
+    @patch("users.views.get_kakao_client")
+    def test_signin_existing_user_success(self, mocked_get_kakao_client):
         client = Client()
 
         class MockedResponse:
@@ -114,7 +202,7 @@ class SignInTest(TestCase):
                     }
                 }
 
-        mocked_requests.get = MagicMock(return_value = MockedResponse())
+        mocked_get_kakao_client.return_value.get_user_info = MagicMock(return_value = MockedResponse().json())
 
         data = {'access_token' : 'fake_access_token'}
         response = client.post('/users/signin', content_type='application/json', data=data)
@@ -122,8 +210,8 @@ class SignInTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['nickname'], 'test')
 
-    @patch("users.views.requests")
-    def test_signin_new_user_create_success(self, mocked_requests):
+    @patch("users.views.get_kakao_client")
+    def test_signin_new_user_create_success(self, mocked_get_kakao_client):
         client = Client()
 
         class MockedResponse:
@@ -143,7 +231,7 @@ class SignInTest(TestCase):
                     }
                 }
 
-        mocked_requests.get = MagicMock(return_value = MockedResponse())
+        mocked_get_kakao_client.return_value.get_user_info = MagicMock(return_value = MockedResponse().json())
 
         data = {'access_token' : 'fake_access_token'}
         response = client.post('/users/signin', content_type='application/json', data=data)
@@ -151,8 +239,8 @@ class SignInTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['nickname'], None)
 
-    @patch("users.views.requests")
-    def test_signin_existing_user_need_nickname(self, mocked_requests):
+    @patch("users.views.get_kakao_client")
+    def test_signin_existing_user_need_nickname(self, mocked_get_kakao_client):
         client = Client()
 
         class MockedResponse:
@@ -172,7 +260,7 @@ class SignInTest(TestCase):
                     }
                 }
 
-        mocked_requests.get = MagicMock(return_value = MockedResponse())
+        mocked_get_kakao_client.return_value.get_user_info = MagicMock(return_value = MockedResponse().json())
 
         data = {'access_token' : 'fake_access_token'}
         response = client.post('/users/signin', content_type='application/json', data=data)
@@ -180,8 +268,8 @@ class SignInTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['nickname'], None)
 
-    @patch("users.views.requests")
-    def test_signin_token_key_error(self, mocked_requests):
+    @patch("users.views.get_kakao_client")
+    def test_signin_token_key_error(self, mocked_get_kakao_client):
         client = Client()
 
         class MockedResponse:
@@ -201,7 +289,7 @@ class SignInTest(TestCase):
                     }
                 }
 
-        mocked_requests.get = MagicMock(return_value = MockedResponse())
+        mocked_get_kakao_client.return_value.get_user_info = MagicMock(return_value = MockedResponse().json())
 
         data = {'access_token2222' : 'fake_access_token'}
 
@@ -210,6 +298,97 @@ class SignInTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json(), {'MESSAGE':'KEY_ERROR'})
 
+class KakaoStubHandler(BaseHTTPRequestHandler):
+    delay    = 0
+    requests = 0
+    body     = json.dumps({'id': 1111111111, 'kakao_account': {'email': 'test@test.com'}}).encode()
+
+    def do_GET(self):
+        KakaoStubHandler.requests += 1
+        time.sleep(self.delay)
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(self.body)))
+            self.end_headers()
+            self.wfile.write(self.body)
+
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+class KakaoClientTest(TestCase):
+    def setUp(self):
+        KakaoStubHandler.delay    = 0
+        KakaoStubHandler.requests = 0
+        self.addCleanup(setattr, KakaoStubHandler, 'body', KakaoStubHandler.body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KakaoStubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get_client(self, **kwargs):
+        options = {
+            'base_url'       : f'http://127.0.0.1:{self.server.server_port}',
+            'connect_timeout': 1,
+            'read_timeout'   : 0.2,
+            'pool_size'      : 2,
+            'breaker'        : CircuitBreaker(2, 60),
+        }
+        options.update(kwargs)
+
+        return KakaoClient(**options)
+
+    def test_get_user_info(self):
+        self.assertEqual(self.get_client().get_user_info('token')['id'], 1111111111)
+
+    def test_token_cache(self):
+        client = self.get_client(cache=caches['default'], cache_ttl=60)
+
+        client.get_user_info('cached-token')
+        client.get_user_info('cached-token')
+
+        self.assertEqual(KakaoStubHandler.requests, 1)
+
+    def test_slow_upstream_opens_circuit(self):
+        KakaoStubHandler.delay = 0.5
+        client = self.get_client()
+
+        for _ in range(2):
+            with self.assertRaises(KakaoUnavailable):
+                client.get_user_info('token')
+
+        started = time.monotonic()
+
+        with self.assertRaises(KakaoUnavailable):
+            client.get_user_info('token')
+
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(KakaoStubHandler.requests, 2)
+
+    def test_malformed_response_opens_circuit(self):
+        KakaoStubHandler.body = b'<html>bad gateway</html>'
+        client = self.get_client()
+
+        for _ in range(3):
+            with self.assertRaises(KakaoUnavailable):
+                client.get_user_info('token')
+
+        self.assertEqual(KakaoStubHandler.requests, 2)
+
+    @patch("users.views.get_kakao_client")
+    def test_signin_kakao_unavailable(self, mocked_get_kakao_client):
+        mocked_get_kakao_client.return_value.get_user_info = MagicMock(side_effect=KakaoUnavailable)
+
+        response = Client().post('/users/signin', content_type='application/json', data={'access_token' : 'token'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'MESSAGE':'KAKAO_UNAVAILABLE'})
+
 class NicknameRegisterTest(TestCase):
     def setUp(self):
         self.users = User.objects.bulk_create([
@@ -256,6 +435,81 @@ class NicknameRegisterTest(TestCase):
 
         self.assertEqual(response.status_code, 409)
         self.assertEqual(response.json(), {'MESSAGE':'NICKNAME_ALREADY_EXISTS'})
+        self.assertIsNone(User.objects.get(id=self.users[1].id).nickname)
+
+    def test_nickname_register_ignores_spaces(self):
+        client = Client()
+
+        response = client.post(f'/users/{self.users[1].id}/nickname', content_type='application/json', data={'nickname': ' test '})
+
+        self.assertEqual(response.status_code, 409)
+
+        response = client.post(f'/users/{self.users[1].id}/nickname', content_type='application/json', data={'nickname': ' Jun '})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(id=self.users[1].id).nickname, 'Jun')
+
+    @skipUnless(connection.vendor == 'mysql', 'the unique index is only case-insensitive under MySQL collations')
+    def test_nickname_register_ignores_case(self):
+        response = Client().post(f'/users/{self.users[1].id}/nickname', content_type='application/json', data={'nickname': 'TEST'})
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_nickname_register_invalid_body(self):
+        client = Client()
+
+        for data in [{}, {'nickname': 1}, ['test']]:
+            response = client.post(f'/users/{self.users[1].id}/nickname', content_type='application/json', data=data)
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'MESSAGE':'KEY_ERROR'})
+
+    def test_nickname_unique_at_database_level(self):
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                User.objects.filter(id=self.users[1].id).update(nickname='test')
+
+    def test_nickname_availability_success(self):
+        client = Client()
+
+        with self.assertNumQueries(1):
+            response = client.get('/users/nicknames', {'names': 'test,test2,test3'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'RESULT': {'test': False, 'test2': True, 'test3': True}})
+
+    def test_nickname_availability_ignores_spaces(self):
+        response = Client().get('/users/nicknames', {'names': ' test, other '})
+
+        self.assertEqual(response.json(), {'RESULT': {'test': False, 'other': True}})
+
+    def test_nickname_availability_agrees_with_claim(self):
+        client   = Client()
+        response = client.get('/users/nicknames', {'names': 'TEST'})
+        claim    = client.post(f'/users/{self.users[1].id}/nickname', content_type='application/json', data={'nickname': 'TEST'})
+
+        self.assertEqual(response.json()['RESULT']['TEST'], claim.status_code == 200)
+
+    def test_nickname_availability_is_one_query(self):
+        with self.assertNumQueries(1):
+            Client().get('/users/nicknames', {'names': 'test,test2,test3'})
+
+    def test_nickname_availability_without_names(self):
+        client = Client()
+
+        response = client.get('/users/nicknames')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE':'KEY_ERROR'})
+
+    @override_settings(NICKNAME_CHECK_MAX_NAMES=2)
+    def test_nickname_availability_too_many_names(self):
+        client = Client()
+
+        response = client.get('/users/nicknames', {'names': 'a,b,c'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE':'TOO_MANY_NAMES'})
 
 class UserFollowListTest(TestCase):
     def setUp(self):
@@ -292,7 +546,54 @@ class UserFollowListTest(TestCase):
 
         response = client.get('/users/follow', HTTP_AUTHORIZATION=token, content_type='application/json')
 
-        self.assertEqual(response.json(),{'response':[{'id':2, 'nickname':'test2'},{'id':3, 'nickname':'test3'}]})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)),{'response':[{'id':2, 'nickname':'test2'},{'id':3, 'nickname':'test3'}]})
+
+class StreamingResponseMemoryTest(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = "test" + str(i),
+                kakao_id    = i,
+                kakao_email = "test" + str(i) + "@test.com"
+            ) for i in range(1, 5002)]
+        )
+
+        Follow.objects.bulk_create([
+            Follow(follower_id=1, followed_id=i) for i in range(2, 5002)
+        ])
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def measure_peak(self, function):
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return peak
+
+    def test_follow_list_streaming_peak_memory(self):
+        def build_in_memory():
+            followings = User.objects.filter(followed__follower=1)
+
+            result = [{
+                    "id"       : following.id,
+                    "nickname" : following.nickname,
+            } for following in followings]
+
+            JsonResponse({"response":result}, status=200)
+
+        def stream():
+            response = Client().get('/users/follow', HTTP_AUTHORIZATION=self.token)
+
+            for chunk in response.streaming_content:
+                pass
+
+        in_memory_peak = self.measure_peak(build_in_memory)
+        streaming_peak = self.measure_peak(stream)
+
+        self.assertLess(streaming_peak, in_memory_peak / 2)
 
 class FollowTest(TestCase):
     def setUp(self):
@@ -345,6 +646,28 @@ class FollowTest(TestCase):
 
         self.assertEqual(second_response.json()['MESSAGE'],'UNFOLLOWED')
 
+    def test_follow_locks_both_users_in_id_order(self):
+        token = jwt.encode({'id': 2}, SECRET_KEY, algorithm=ALGORITHM)
+
+        with CaptureQueriesContext(connection) as queries:
+            Client().post('/users/follow', {'user_id': 1}, HTTP_AUTHORIZATION=token, content_type='application/json')
+
+        statements = [query['sql'] for query in queries]
+        locked     = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT "users"."id" FROM "users"') and sql.endswith('ORDER BY "users"."id" ASC'))
+        written    = next(i for i, sql in enumerate(statements) if 'follows' in sql and sql.startswith('INSERT'))
+
+        self.assertRegex(statements[locked], r'IN \((1, 2|2, 1)\)')
+
+        self.assertLess(locked, written)
+
+    def test_follow_self(self):
+        response = Client().post('/users/follow', {'user_id': 1}, HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['MESSAGE'],'CANNOT_FOLLOW_SELF')
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(User.objects.get(id=1).following_count, 0)
+
 class PurchaseListTest(TestCase):
     def setUp(self):
         self.user = User.objects.create(
@@ -380,7 +703,7 @@ class PurchaseListTest(TestCase):
                 purchased_quantity   = 1,
                 purchased_price      = 20000, 
                 paypal_payer_id      = 'testid',
-                paypal_payment_id    = 'testpayment',
+                paypal_payment_id    = 'testpayment1',
                 paypal_payment_token = 'testtoken',
             ),
             PurchaseHistory(
@@ -389,7 +712,7 @@ class PurchaseListTest(TestCase):
                 purchased_quantity   = 1,
                 purchased_price      = 15000, 
                 paypal_payer_id      = 'testid',
-                paypal_payment_id    = 'testpayment',
+                paypal_payment_id    = 'testpayment2',
                 paypal_payment_token = 'testtoken',
             ),
         ])
@@ -409,6 +732,46 @@ class PurchaseListTest(TestCase):
         response = client.get('/users/purchase-history', HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
 
         self.assertEqual(response.status_code, 200)
+        self.assertEqual([purchase['price'] for purchase in response.json()['RESPONSE']], [15000, 20000])
+        self.assertFalse(response.json()['HAS_NEXT'])
+
+    def test_purchase_history_get_cursor_pages(self):
+        client = Client()
+
+        response = client.get('/users/purchase-history', {'limit': 1}, HTTP_AUTHORIZATION=self.access_token)
+
+        self.assertEqual([purchase['price'] for purchase in response.json()['RESPONSE']], [15000])
+        self.assertTrue(response.json()['HAS_NEXT'])
+
+        response = client.get('/users/purchase-history', {'limit': 1, 'cursor': response.json()['NEXT_CURSOR']}, HTTP_AUTHORIZATION=self.access_token)
+
+        self.assertEqual([purchase['price'] for purchase in response.json()['RESPONSE']], [20000])
+        self.assertIsNone(response.json()['NEXT_CURSOR'])
+
+    def test_purchase_summary_follows_posts(self):
+        client = Client()
+
+        response = client.get('/users/purchase-summary', HTTP_AUTHORIZATION=self.access_token)
+        self.assertEqual(response.json()['RESULT'], {'total_spent': 0, 'order_count': 0, 'last_purchased_at': None})
+
+        for price in [10000, 2500]:
+            data = {
+                'product_id'   : 1,
+                'price'        : price,
+                'payerID'      : 'aaabbbccc',
+                'paymentID'    : f'payment{price}',
+                'paymentToken' : 'paypaltoken'
+            }
+            client.post('/users/purchase-history', data, HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
+
+        summary = PurchaseSummary.objects.get(user_id=self.user.id)
+
+        with self.assertNumQueries(1):
+            response = client.get('/users/purchase-summary', HTTP_AUTHORIZATION=self.access_token)
+
+        self.assertEqual(response.json()['RESULT']['total_spent'], 12500)
+        self.assertEqual(response.json()['RESULT']['order_count'], 2)
+        self.assertEqual(summary.last_purchased_at, PurchaseHistory.objects.latest('id').purchased_time)
 
     def test_purchase_history_post_success(self):
         client = Client()
@@ -425,6 +788,122 @@ class PurchaseListTest(TestCase):
 
         self.assertEqual(response.status_code, 201)
 
+    def test_purchase_history_post_replay_returns_original(self):
+        client = Client()
+
+        data = {
+            'product_id'   : 1,
+            'price'        : 10000,
+            'payerID'      : 'aaabbbccc',
+            'paymentID'    : 'replayed',
+            'paymentToken' : 'paypaltoken'
+        }
+
+        first  = client.post('/users/purchase-history', data, HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
+        second = client.post('/users/purchase-history', data, HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), {'MESSAGE': 'ALREADY_RECORDED', 'purchase_id': first.json()['purchase_id']})
+        self.assertEqual(PurchaseHistory.objects.filter(paypal_payment_id='replayed').count(), 1)
+        self.assertEqual(PurchaseSummary.objects.get(user_id=self.user.id).order_count, 1)
+        self.assertEqual(ProductOption.objects.get(id=1).stock, 9)
+
+    def test_purchase_history_post_reserves_option_stock(self):
+        client = Client()
+        white  = Color.objects.create(id=2, name='white')
+        ProductOption.objects.create(id=2, product=self.product, color=white, stock=3)
+
+        def buy(payment_id, **fields):
+            data = dict({
+                'product_id'   : 1,
+                'price'        : 10000,
+                'payerID'      : 'aaabbbccc',
+                'paymentID'    : payment_id,
+                'paymentToken' : 'paypaltoken'
+            }, **fields)
+
+            return client.post('/users/purchase-history', data, HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
+
+        self.assertEqual(buy('ambiguous').json(), {'MESSAGE': 'OPTION_REQUIRED'})
+        self.assertEqual(buy('unknown', option_id=99).json(), {'MESSAGE': 'OPTION_DOES_NOT_EXIST'})
+        self.assertEqual(buy('zero', option_id=2, quantity=0).json(), {'MESSAGE': 'INVALID_QUANTITY'})
+        self.assertEqual(buy('text', option_id='two').json(), {'MESSAGE': 'INVALID_IDS'})
+        self.assertEqual(buy('text', product_id='one').json(), {'MESSAGE': 'INVALID_IDS'})
+
+        malformed = client.post('/users/purchase-history', '{"product_id": 1,', HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
+
+        self.assertEqual(malformed.status_code, 400)
+        self.assertEqual(malformed.json(), {'MESSAGE': 'INVALID_BODY'})
+
+        self.assertEqual(buy('white1', option_id=2, quantity=2).status_code, 201)
+
+        response = buy('white2', option_id=2, quantity=2)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'MESSAGE': 'OUT_OF_STOCK'})
+        self.assertFalse(PurchaseHistory.objects.filter(paypal_payment_id='white2').exists())
+        self.assertEqual(PurchaseSummary.objects.get(user_id=self.user.id).order_count, 1)
+        self.assertEqual(dict(ProductOption.objects.values_list('id', 'stock')), {1: 10, 2: 1})
+
+    def test_purchase_history_post_payment_of_other_user(self):
+        other = User.objects.create(id=2, nickname='other', kakao_id=2, kakao_email='other@test.com')
+        token = jwt.encode({'id': other.id}, SECRET_KEY, algorithm=ALGORITHM)
+
+        data = {
+            'product_id'   : 1,
+            'price'        : 20000,
+            'payerID'      : 'testid',
+            'paymentID'    : 'testpayment1',
+            'paymentToken' : 'testtoken'
+        }
+
+        response = Client().post('/users/purchase-history', data, HTTP_AUTHORIZATION=token, content_type='application/json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {'MESSAGE': 'PAYMENT_ALREADY_USED'})
+
+    def test_ingest_purchases_command_is_idempotent(self):
+        export = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.remove, export.name)
+
+        with export:
+            export.write('user_id,product_option_id,quantity,price,payer_id,payment_id,payment_token,purchased_time\n')
+            export.write('1,1,1,20000,testid,testpayment1,testtoken,\n')
+            export.write('1,1,2,5000,testid,exported1,testtoken,2021-08-01 10:00:00\n')
+            export.write('1,1,1,7000,testid,exported2,testtoken,2021-08-02 10:00:00\n')
+            export.write('1,1,1,7000,testid,exported2,testtoken,2021-08-02 10:00:00\n')
+
+        output = StringIO()
+        call_command('ingest_purchases', export.name, batch_size=2, stdout=output)
+        call_command('ingest_purchases', export.name, stdout=StringIO())
+
+        self.assertIn('Read 4 purchases, recorded 2, skipped 2 already recorded', output.getvalue())
+        self.assertEqual(PurchaseHistory.objects.count(), 4)
+
+        summary = PurchaseSummary.objects.get(user_id=self.user.id)
+        self.assertEqual((summary.total_spent, summary.order_count), (52000, 4))
+        self.assertEqual(PurchaseHistory.objects.get(paypal_payment_id='exported2').purchased_time.strftime('%Y-%m-%d %H:%M'), '2021-08-02 10:00')
+
+    def test_refresh_summaries_locks_before_aggregating(self):
+        other = User.objects.create(id=2, nickname='other', kakao_id=2, kakao_email='other@test.com')
+
+        PurchaseHistory.objects.create(user=other, purchased_product_id=1, purchased_quantity=2, purchased_price=3000, paypal_payment_id='other1')
+        PurchaseSummary.objects.update_or_create(user_id=self.user.id, defaults={'total_spent': 1, 'order_count': 9})
+
+        with CaptureQueriesContext(connection) as queries:
+            refresh_summaries({self.user.id, other.id})
+
+        statements = [query['sql'] for query in queries]
+        locked     = next(i for i, sql in enumerate(statements) if sql.startswith('SELECT') and 'FROM "purchase_summaries"' in sql)
+        aggregated = next(i for i, sql in enumerate(statements) if 'FROM "purchase_histories"' in sql)
+
+        self.assertLess(locked, aggregated)
+        self.assertEqual(
+            {summary.user_id : (summary.total_spent, summary.order_count) for summary in PurchaseSummary.objects.all()},
+            {self.user.id : (35000, 2), other.id : (6000, 1)}
+        )
+
     def test_purchase_history_post_key_error(self):
         client = Client()
 
@@ -438,4 +917,313 @@ class PurchaseListTest(TestCase):
 
         response = client.post('/users/purchase-history', data, HTTP_AUTHORIZATION=self.access_token, content_type='application/json')
 
-        self.assertEqual(response.status_code, 400)
\ No newline at end of file
+        self.assertEqual(response.status_code, 400)
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'graph{i}',
+                kakao_id    = i,
+                kakao_email = f'graph{i}@test.com'
+            ) for i in range(1, 41)
+        ])
+
+        generator = random.Random(14)
+        edges     = {
+            (follower_id, followed_id)
+            for follower_id, followed_id in ((generator.randint(1, 40), generator.randint(1, 40)) for _ in range(400))
+            if follower_id != followed_id
+        }
+
+        Follow.objects.bulk_create([Follow(follower_id=follower_id, followed_id=followed_id) for follower_id, followed_id in edges])
+
+        cls.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def db_followings(self, user_id):
+        return sorted(Follow.objects.filter(follower_id=user_id).values_list('followed_id', flat=True))
+
+    def db_followers(self, user_id):
+        return sorted(Follow.objects.filter(followed_id=user_id).values_list('follower_id', flat=True))
+
+    def test_graph_matches_database(self):
+        graph = FollowGraph()
+
+        for user_id in range(1, 41):
+            followings = self.db_followings(user_id)
+            followers  = self.db_followers(user_id)
+
+            self.assertEqual(list(graph.followings(user_id)), followings)
+            self.assertEqual(list(graph.followers(user_id)), followers)
+            self.assertEqual(graph.mutuals(user_id), sorted(set(followings) & set(followers)))
+            self.assertEqual(graph.following_any(user_id, [1, 5, 10, 20, 40]), set(followings) & {1, 5, 10, 20, 40})
+
+    def test_bulk_load_is_one_query(self):
+        graph = FollowGraph()
+
+        with self.assertNumQueries(1):
+            followings = graph.followings_many(range(1, 41))
+
+        with self.assertNumQueries(0):
+            graph.followings(7)
+
+        self.assertEqual({user_id : list(ids) for user_id, ids in followings.items()}, {user_id : self.db_followings(user_id) for user_id in range(1, 41)})
+
+    def test_follow_view_keeps_graph_current(self):
+        client = Client()
+        graph  = FollowGraph()
+        target = next(user_id for user_id in range(2, 41) if not graph.is_following(1, user_id))
+
+        graph.followers(target)
+
+        with patch('users.views.get_follow_graph', return_value=graph), self.captureOnCommitCallbacks(execute=True):
+            client.post('/users/follow', {'user_id': target}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertTrue(graph.is_following(1, target))
+        self.assertIn(1, graph.followers(target))
+        self.assertEqual(list(graph.followings(1)), self.db_followings(1))
+
+        with patch('users.views.get_follow_graph', return_value=graph), self.captureOnCommitCallbacks(execute=True):
+            client.post('/users/follow', {'user_id': target}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertFalse(graph.is_following(1, target))
+        self.assertEqual(list(graph.followers(target)), self.db_followers(target))
+
+    def test_follow_committed_during_load_is_not_lost(self):
+        graph  = FollowGraph()
+        target = next(user_id for user_id in range(2, 41) if user_id not in self.db_followings(1))
+        raced  = []
+
+        def follow_during_query(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+
+            if not raced:
+                raced.append(target)
+                Follow.objects.create(follower_id=1, followed_id=target)
+                graph.add(1, target)
+
+            return result
+
+        with connection.execute_wrapper(follow_during_query):
+            followings = list(graph.followings(1))
+
+        self.assertIn(target, followings)
+
+        with self.assertNumQueries(0):
+            cached = list(graph.followings(1))
+
+        self.assertEqual(cached, self.db_followings(1))
+
+    def test_stale_entries_are_reloaded(self):
+        graph = FollowGraph(max_age=0)
+        graph.followings(1)
+
+        target = next(user_id for user_id in range(2, 41) if not graph.is_following(1, user_id))
+        Follow.objects.create(follower_id=1, followed_id=target)
+
+        self.assertTrue(graph.is_following(1, target))
+
+    def test_viewer_state_uses_graph(self):
+        graph      = FollowGraph()
+        followings = set(self.db_followings(1))
+        viewer     = User.objects.get(id=1)
+
+        graph.followings(1)
+
+        with patch('users.viewer_state.get_follow_graph', return_value=graph), self.assertNumQueries(0):
+            state = ViewerState(viewer, author_ids=range(2, 41))
+
+        self.assertEqual(state.followed_user_ids, followings)
+
+class RecommendationTest(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'recommend{i}',
+                kakao_id    = i,
+                kakao_email = f'recommend{i}@test.com'
+            ) for i in range(1, 7)
+        ])
+
+        Follow.objects.bulk_create([
+            Follow(follower_id=follower_id, followed_id=followed_id)
+            for follower_id, followed_id in [(1, 2), (1, 3), (2, 4), (3, 4), (2, 5), (3, 1), (2, 3)]
+        ])
+
+        DesignType.objects.create(id=1, name='거실')
+
+        postings = [
+            Posting.objects.create(content=f'posting{i}', image_url=f'/posting{i}.png', user_id=2, design_type_id=1)
+            for i in range(2)
+        ]
+
+        Bookmark.objects.bulk_create([
+            Bookmark(user_id=user_id, posting=posting)
+            for user_id, posting in [(1, postings[0]), (1, postings[1]), (6, postings[0]), (6, postings[1]), (5, postings[0])]
+        ])
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def get_recommendations(self):
+        response = Client().get('/users/recommendations', HTTP_AUTHORIZATION=self.token)
+
+        self.assertEqual(response.status_code, 200)
+        return [(row['id'], row['score']) for row in response.json()['RESULT']]
+
+    def test_recommendations_rank_co_follows_and_shared_bookmarks(self):
+        call_command('refresh_recommendations', stdout=StringIO())
+
+        self.assertEqual(self.get_recommendations(), [(4, 4), (5, 3), (6, 2)])
+
+    def test_recommendations_empty_before_refresh(self):
+        self.assertEqual(self.get_recommendations(), [])
+
+    def test_follow_hides_candidate_and_marks_user_stale(self):
+        call_command('refresh_recommendations', stdout=StringIO())
+
+        Client().post('/users/follow', {'user_id': 4}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertEqual(self.get_recommendations(), [(5, 3), (6, 2)])
+        self.assertIsNone(User.objects.get(id=1).recommendations_updated_at)
+        self.assertIsNotNone(User.objects.get(id=2).recommendations_updated_at)
+
+    def test_unfollow_marks_user_stale_even_with_stale_counter(self):
+        call_command('refresh_recommendations', stdout=StringIO())
+
+        response = Client().post('/users/follow', {'user_id': 2}, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertEqual(response.json(), {'MESSAGE': 'UNFOLLOWED'})
+        self.assertEqual(User.objects.get(id=1).following_count, 0)
+        self.assertIsNone(User.objects.get(id=1).recommendations_updated_at)
+
+    def test_refresh_only_touches_stale_users(self):
+        call_command('refresh_recommendations', stdout=StringIO())
+        User.objects.filter(id=1).update(recommendations_updated_at=None)
+        Recommendation.objects.filter(user_id=2).delete()
+
+        output = StringIO()
+        call_command('refresh_recommendations', stdout=output)
+
+        self.assertIn('Refreshed recommendations for 1 users', output.getvalue())
+        self.assertFalse(Recommendation.objects.filter(user_id=2).exists())
+        self.assertTrue(Recommendation.objects.filter(user_id=1).exists())
+
+class FollowListPaginationTest(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'follow{i}',
+                kakao_id    = i,
+                kakao_email = f'follow{i}@test.com'
+            ) for i in range(1, 10)
+        ])
+
+        Follow.objects.bulk_create([Follow(id=i, follower_id=i, followed_id=1) for i in range(2, 10)])
+        Follow.objects.bulk_create([Follow(id=10 + i, follower_id=1, followed_id=i) for i in range(2, 4)])
+        User.objects.filter(id=1).update(follower_count=8, following_count=2)
+
+    def collect(self, url, limit):
+        client = Client()
+        pages  = []
+        params = {'limit': limit}
+
+        while True:
+            with self.assertNumQueries(2):
+                response = client.get(url, params)
+
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+
+            if not response.json()['HAS_NEXT']:
+                return pages
+
+            params['cursor'] = response.json()['NEXT_CURSOR']
+
+    def test_followers_paginated_newest_first(self):
+        pages = self.collect('/users/1/followers', 3)
+
+        self.assertEqual([len(page['RESULT']) for page in pages], [3, 3, 2])
+        self.assertEqual([row['id'] for page in pages for row in page['RESULT']], list(range(9, 1, -1)))
+        self.assertEqual({page['TOTAL'] for page in pages}, {8})
+
+    def test_following_paginated(self):
+        pages = self.collect('/users/1/following', 5)
+
+        self.assertEqual(pages[0]['RESULT'], [{'id': 3, 'nickname': 'follow3'}, {'id': 2, 'nickname': 'follow2'}])
+        self.assertEqual(pages[0]['TOTAL'], 2)
+        self.assertIsNone(pages[0]['NEXT_CURSOR'])
+
+    def test_follow_list_unknown_user(self):
+        response = Client().get('/users/100/followers')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'MESSAGE':'USER_DOES_NOT_EXIST'})
+
+    def test_follow_list_invalid_cursor(self):
+        response = Client().get('/users/1/followers', {'cursor': 'abc'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE':'INVALID_CURSOR'})
+
+class FollowBatchTest(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(
+                id          = i,
+                nickname    = f'batch{i}',
+                kakao_id    = i,
+                kakao_email = f'batch{i}@test.com'
+            ) for i in range(1, 6)
+        ])
+
+        DesignType.objects.create(id=1, name='거실')
+        Posting.objects.create(id=1, content='posting', image_url='/posting.png', user_id=2, design_type_id=1)
+        Posting.objects.create(id=2, content='posting', image_url='/posting.png', user_id=4, design_type_id=1)
+
+        Follow.objects.create(follower_id=1, followed_id=3)
+        Follow.objects.create(follower_id=1, followed_id=4)
+        Timeline.objects.create(user_id=1, posting_id=2, created_at=Posting.objects.get(id=2).created_at)
+        User.objects.filter(id=1).update(following_count=2)
+        User.objects.filter(id__in=[3, 4]).update(follower_count=1)
+
+        self.token = jwt.encode({'id': 1}, SECRET_KEY, algorithm=ALGORITHM)
+
+    def test_follow_batch_per_id_results(self):
+        data     = {'add': [2, 3, 1, 100], 'remove': [4, 5]}
+        response = Client().post('/users/follows', data, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['RESULT'], [
+            {'user_id': 2, 'result': 'FOLLOWED'},
+            {'user_id': 3, 'result': 'ALREADY_FOLLOWING'},
+            {'user_id': 1, 'result': 'CANNOT_FOLLOW_SELF'},
+            {'user_id': 100, 'result': 'USER_DOES_NOT_EXIST'},
+            {'user_id': 4, 'result': 'UNFOLLOWED'},
+            {'user_id': 5, 'result': 'NOT_FOLLOWING'},
+        ])
+        self.assertEqual(sorted(Follow.objects.filter(follower_id=1).values_list('followed_id', flat=True)), [2, 3])
+        self.assertEqual(
+            dict(User.objects.filter(id__in=[1, 2, 3, 4]).values_list('id', 'follower_count')),
+            {1: 0, 2: 1, 3: 1, 4: 0}
+        )
+        self.assertEqual(User.objects.get(id=1).following_count, 2)
+        self.assertEqual(list(Timeline.objects.filter(user_id=1).values_list('posting_id', flat=True)), [1])
+
+    def test_follow_batch_never_drives_stale_counter_negative(self):
+        User.objects.filter(id=1).update(following_count=0)
+
+        data     = {'remove': [3, 4]}
+        response = Client().post('/users/follows', data, HTTP_AUTHORIZATION=self.token, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(id=1).following_count, 0)
+        self.assertIsNone(User.objects.get(id=1).recommendations_updated_at)
+
+    def test_follow_unique_constraint(self):
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Follow.objects.create(follower_id=1, followed_id=3)
@@ -1,11 +1,17 @@
 from users.models import PurchaseHistory
 from django.urls import path
 
-from users.views import SocialSignInView, NicknameView, FollowView, PurchaseHistoryView
+from users.views import SocialSignInView, NicknameView, NicknameAvailabilityView, FollowView, FollowBatchView, FollowingListView, FollowerListView, RecommendationView, PurchaseHistoryView, PurchaseSummaryView
 
 urlpatterns = [
     path('/signin', SocialSignInView.as_view()),
     path('/<int:user_id>/nickname', NicknameView.as_view()),
+    path('/nicknames', NicknameAvailabilityView.as_view()),
     path('/follow', FollowView.as_view()),
-    path('/purchase-history', PurchaseHistoryView.as_view())
+    path('/follows', FollowBatchView.as_view()),
+    path('/<int:user_id>/following', FollowingListView.as_view()),
+    path('/<int:user_id>/followers', FollowerListView.as_view()),
+    path('/recommendations', RecommendationView.as_view()),
+    path('/purchase-history', PurchaseHistoryView.as_view()),
+    path('/purchase-summary', PurchaseSummaryView.as_view())
 ]
\ No newline at end of file
@@ -1,11 +1,52 @@
-import jwt
+import jwt, time
 
+from django.conf            import settings
+from django.core.cache      import caches
 from django.http.response   import JsonResponse
 
+from metrics                import cache_stats
 from my_settings            import ALGORITHM
 from users.models           import User
 from homestagram.settings   import SECRET_KEY
 
+USER_SNAPSHOT_FIELDS = ('id', 'nickname', 'kakao_id', 'kakao_email')
+
+stats = cache_stats('signed_in_users')
+
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+def get_signed_in_user(payload):
+    cache    = caches[settings.USER_CACHE]
+    key      = user_cache_key(payload['id'])
+    snapshot = cache.get(key)
+
+    if snapshot is None:
+        stats.miss()
+
+        snapshot = User.objects.values_list(*USER_SNAPSHOT_FIELDS).get(id=payload['id'])
+        timeout  = settings.USER_CACHE_TTL
+
+        if 'exp' in payload:
+            timeout = min(timeout, max(int(payload['exp'] - time.time()), 1))
+
+        if snapshot[USER_SNAPSHOT_FIELDS.index('nickname')]:
+            cache.set(key, snapshot, timeout)
+
+    else:
+        stats.hit()
+
+    return User.from_db('default', USER_SNAPSHOT_FIELDS, snapshot)
+
+def invalidate_user(user_id):
+    caches[settings.USER_CACHE].delete(user_cache_key(user_id))
+
+def lock_user(*user_ids):
+    # Rows are always locked in id order, so two requests touching the same
+    # users (A follows B while B follows A) wait on each other, not deadlock.
+    list(User.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list('id', flat=True))
+
 
 class SignInDecorator: 
     def __init__(self, function):
@@ -16,7 +57,7 @@ class SignInDecorator:
         try:
             if token:
                 payload       = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-                request.user  = User.objects.get(id = payload["id"])
+                request.user  = get_signed_in_user(payload)
 
                 if not request.user.nickname:
                     return JsonResponse({"MESSAGE":"NEED_NICKNAME"}, status=401)
@@ -25,5 +66,11 @@ class SignInDecorator:
 
             return JsonResponse({"MESSAGE":"NEED_LOGIN"}, status=401)
 
+        except jwt.ExpiredSignatureError:
+            return JsonResponse({"MESSAGE":"EXPIRED_TOKEN"}, status=401)
+
         except jwt.DecodeError:
-            return JsonResponse({"MESSAGE":"INVALID_TOKEN"}, status=401)
\ No newline at end of file
+            return JsonResponse({"MESSAGE":"INVALID_TOKEN"}, status=401)
+
+        except User.DoesNotExist:
+            return JsonResponse({"MESSAGE":"INVALID_USER"}, status=401)
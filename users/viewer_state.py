@@ -0,0 +1,42 @@
+from users.models       import Bookmark, Follow
+from users.follow_graph import get_follow_graph
+
+
+class ViewerState:
+    def __init__(self, user, posting_ids=(), author_ids=()):
+        posting_ids = {posting_id for posting_id in posting_ids if posting_id}
+        author_ids  = {author_id for author_id in author_ids if author_id}
+
+        self.bookmarked_posting_ids = set()
+        self.followed_user_ids      = set()
+
+        if user and posting_ids:
+            self.bookmarked_posting_ids = set(
+                Bookmark.objects.filter(user_id=user.id, posting_id__in=posting_ids).values_list('posting_id', flat=True)
+            )
+
+        graph = get_follow_graph()
+
+        if user and author_ids and graph:
+            self.followed_user_ids = graph.following_any(user.id, author_ids)
+
+        elif user and author_ids:
+            self.followed_user_ids = set(
+                Follow.objects.filter(follower_id=user.id, followed_id__in=author_ids).values_list('followed_id', flat=True)
+            )
+
+    def is_bookmarked(self, posting_id):
+        return posting_id in self.bookmarked_posting_ids
+
+    def is_following(self, user_id):
+        return user_id in self.followed_user_ids
+
+    def annotate(self, rows, posting_key='feedId', author_key='feeduserId'):
+        for row in rows:
+            if posting_key:
+                row['bookmark'] = self.is_bookmarked(row[posting_key])
+
+            if author_key:
+                row['follow'] = self.is_following(row[author_key])
+
+        return rows
@@ -1,11 +1,22 @@
-import json, jwt, requests
+import json, jwt
 
+from django.conf  import settings
 from django.views import View
 from django.http  import JsonResponse
+from django.db    import transaction, IntegrityError
+from django.db.models import F
 
 from products.models import ProductOption
-from users.models import PurchaseHistory, User, Follow
-from users.utils  import SignInDecorator
+from products.stock  import reserve, OutOfStock
+from products.trending import record_purchases
+from users.models import PurchaseHistory, PurchaseSummary, User, Follow, Recommendation
+from users.utils  import SignInDecorator, invalidate_user, lock_user
+from users.kakao  import get_kakao_client, KakaoUnavailable
+from users.follow_graph import get_follow_graph
+from postings.timeline import backfill, prune, backfill_many, prune_many
+from postings.fragments import bump_version
+from postings.utils     import get_limit, get_batch_ids, parse_id, shift
+from responses         import StreamingJsonResponse
 from my_settings  import SECRET_KEY, ALGORITHM
 
 class SocialSignInView(View):
@@ -14,7 +25,7 @@ class SocialSignInView(View):
             data = json.loads(request.body)
 
             kakao_access_token = data['access_token']
-            kakao_user_info = requests.get('https://kapi.kakao.com/v2/user/me', headers={'Authorization':f'Bearer {kakao_access_token}'}).json()
+            kakao_user_info = get_kakao_client().get_user_info(kakao_access_token)
 
             kakao_id = kakao_user_info.get('id', None)
 
@@ -38,47 +49,250 @@ class SocialSignInView(View):
         except KeyError:
             return JsonResponse({'MESSAGE': 'KEY_ERROR'}, status=400)
 
+        except KakaoUnavailable:
+            return JsonResponse({'MESSAGE': 'KAKAO_UNAVAILABLE'}, status=503)
+
 class NicknameView(View):
     def post(self, request, user_id):
-        nickname = json.loads(request.body)['nickname']
+        try:
+            nickname = json.loads(request.body)['nickname'].strip()
+
+        except (KeyError, TypeError, AttributeError):
+            return JsonResponse({'MESSAGE':'KEY_ERROR'}, status=400)
+
+        if not nickname:
+            return JsonResponse({'MESSAGE':'KEY_ERROR'}, status=400)
 
-        if User.objects.filter(nickname=nickname).exists():
+        try:
+            with transaction.atomic():
+                User.objects.filter(id=user_id).update(nickname=nickname)
+
+        except IntegrityError:
             return JsonResponse({'MESSAGE':'NICKNAME_ALREADY_EXISTS'}, status=409)
 
-        User.objects.filter(id=user_id).update(nickname=nickname)
+        invalidate_user(user_id)
+        bump_version(user_id=user_id)
+        bump_version(comment__user_id=user_id)
 
         return JsonResponse({'MESSAGE':'UPDATED'}, status=200)
 
+class NicknameAvailabilityView(View):
+    def get(self, request):
+        names = list(dict.fromkeys(name.strip() for name in request.GET.get('names', '').split(',') if name.strip()))
+
+        if not names:
+            return JsonResponse({'MESSAGE':'KEY_ERROR'}, status=400)
+
+        if len(names) > settings.NICKNAME_CHECK_MAX_NAMES:
+            return JsonResponse({'MESSAGE':'TOO_MANY_NAMES'}, status=400)
+
+        # Matches names exactly as the unique index does, so under MySQL's
+        # collation 'Test' is reported taken when 'test' exists.
+        taken = {nickname.casefold() for nickname in User.objects.filter(nickname__in=names).values_list('nickname', flat=True)}
+
+        return JsonResponse({'RESULT' : {name : name.casefold() not in taken for name in names}}, status=200)
+
+def update_follow_graph(action, follow):
+    graph = get_follow_graph()
+
+    if graph:
+        transaction.on_commit(lambda: getattr(graph, action)(follow.follower_id, follow.followed_id))
+
 class FollowView(View):
     @SignInDecorator
     def get(self, request):
-        followings = User.objects.filter(followed__follower=request.user.id)
+        followings = User.objects.filter(followed__follower=request.user.id).only('id', 'nickname')
 
-        result = [{
+        result = ({
                 "id"       : following.id,
                 "nickname" : following.nickname,
-        } for following in followings]
+        } for following in followings.iterator(chunk_size=settings.STREAMING_CHUNK_SIZE))
 
-        return JsonResponse({"response":result}, status=200)
+        return StreamingJsonResponse("response", result, status=200)
         
     @SignInDecorator
+    @transaction.atomic
     def post(self, request):
+        followed = User.objects.get(id=json.loads(request.body)['user_id'])
+
+        if followed.id == request.user.id:
+            return JsonResponse({'MESSAGE':'CANNOT_FOLLOW_SELF'}, status=400)
+
+        lock_user(request.user.id, followed.id)
+
         follow, is_created = Follow.objects.get_or_create(
             follower = request.user,
-            followed = User.objects.get(id=json.loads(request.body)['user_id'])
+            followed = followed
         )
 
         if not is_created:
             follow.delete()
+            User.objects.filter(id=follow.followed_id, follower_count__gt=0).update(follower_count=F('follower_count') - 1)
+            User.objects.filter(id=follow.follower_id, following_count__gt=0).update(following_count=F('following_count') - 1)
+            User.objects.filter(id=follow.follower_id).update(recommendations_updated_at=None)
+            prune(follow.follower_id, follow.followed_id)
+            update_follow_graph('remove', follow)
             return JsonResponse({'MESSAGE': 'UNFOLLOWED'}, status=200)
+
+        User.objects.filter(id=follow.followed_id).update(follower_count=F('follower_count') + 1)
+        User.objects.filter(id=follow.follower_id).update(
+            following_count            = F('following_count') + 1,
+            recommendations_updated_at = None
+        )
+        backfill(follow.follower_id, follow.followed_id)
+        update_follow_graph('add', follow)
         
         return JsonResponse({'MESSAGE':'FOLLOWED'}, status=200)
 
+class FollowBatchView(View):
+    @SignInDecorator
+    def post(self, request):
+        try:
+            add, remove = get_batch_ids(json.loads(request.body))
+
+        except (ValueError, TypeError, AttributeError):
+            return JsonResponse({'MESSAGE':'INVALID_IDS'}, status=400)
+
+        if not add and not remove:
+            return JsonResponse({'MESSAGE':'KEY_ERROR'}, status=400)
+
+        if len(add) + len(remove) > settings.BATCH_MUTATION_MAX_IDS:
+            return JsonResponse({'MESSAGE':'TOO_MANY_IDS'}, status=400)
+
+        user = request.user
+
+        with transaction.atomic():
+            lock_user(user.id, *add, *remove)
+
+            existing = set(User.objects.filter(id__in=add).exclude(id=user.id).values_list('id', flat=True))
+            followed = set(Follow.objects.filter(follower_id=user.id, followed_id__in=add + remove).values_list('followed_id', flat=True))
+            created  = [user_id for user_id in add if user_id in existing and user_id not in followed]
+            deleted  = [user_id for user_id in remove if user_id in followed]
+
+            if created:
+                Follow.objects.bulk_create([Follow(follower_id=user.id, followed_id=user_id) for user_id in created], ignore_conflicts=True)
+                User.objects.filter(id__in=created).update(follower_count=F('follower_count') + 1)
+                backfill_many(user.id, created)
+
+            if deleted:
+                Follow.objects.filter(follower_id=user.id, followed_id__in=deleted).delete()
+                User.objects.filter(id__in=deleted, follower_count__gt=0).update(follower_count=F('follower_count') - 1)
+                prune_many(user.id, deleted)
+
+            if created or deleted:
+                User.objects.filter(id=user.id).update(
+                    following_count            = shift('following_count', len(created) - len(deleted)),
+                    recommendations_updated_at = None
+                )
+
+            for user_id in created:
+                update_follow_graph('add', Follow(follower_id=user.id, followed_id=user_id))
+
+            for user_id in deleted:
+                update_follow_graph('remove', Follow(follower_id=user.id, followed_id=user_id))
+
+        results = {user_id : 'FOLLOWED' for user_id in created}
+        results.update({user_id : 'UNFOLLOWED' for user_id in deleted})
+
+        if user.id in add:
+            results[user.id] = 'CANNOT_FOLLOW_SELF'
+
+        result = [{
+            'user_id' : user_id,
+            'result'  : results.get(user_id) or ('ALREADY_FOLLOWING' if user_id in followed else 'USER_DOES_NOT_EXIST')
+        } for user_id in add] + [{
+            'user_id' : user_id,
+            'result'  : results.get(user_id, 'NOT_FOLLOWING')
+        } for user_id in remove]
+
+        return JsonResponse({'RESULT' : result}, status=200)
+
+class FollowListView(View):
+    user_field  = None
+    other_field = None
+    counter     = None
+
+    def get(self, request, user_id):
+        try:
+            total  = User.objects.values_list(self.counter, flat=True).get(id=user_id)
+            cursor = request.GET.get('cursor')
+            limit  = get_limit(request)
+
+            follows = Follow.objects.filter(**{self.user_field : user_id}).select_related(self.other_field).order_by('-id')
+
+            if cursor:
+                follows = follows.filter(id__lt=int(cursor))
+
+            follows  = list(follows[:limit + 1])
+            has_next = len(follows) > limit
+            follows  = follows[:limit]
+
+        except User.DoesNotExist:
+            return JsonResponse({'MESSAGE':'USER_DOES_NOT_EXIST'}, status=404)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE':'INVALID_CURSOR'}, status=400)
+
+        result = [{
+            'id'       : getattr(follow, self.other_field).id,
+            'nickname' : getattr(follow, self.other_field).nickname,
+        } for follow in follows]
+
+        return JsonResponse({
+            'RESULT'      : result,
+            'TOTAL'       : total,
+            'HAS_NEXT'    : has_next,
+            'NEXT_CURSOR' : str(follows[-1].id) if has_next else None
+        }, status=200)
+
+class FollowingListView(FollowListView):
+    user_field  = 'follower_id'
+    other_field = 'followed'
+    counter     = 'following_count'
+
+class FollowerListView(FollowListView):
+    user_field  = 'followed_id'
+    other_field = 'follower'
+    counter     = 'follower_count'
+
+class RecommendationView(View):
+    @SignInDecorator
+    def get(self, request):
+        recommendations = (
+            Recommendation.objects.filter(user_id=request.user.id)
+                .exclude(candidate_id__in=Follow.objects.filter(follower_id=request.user.id).values('followed_id'))
+                .select_related('candidate')
+                .order_by('-score', 'candidate_id')[:settings.RECOMMENDATION_SIZE]
+        )
+
+        result = [{
+            'id'       : recommendation.candidate.id,
+            'nickname' : recommendation.candidate.nickname,
+            'score'    : recommendation.score,
+        } for recommendation in recommendations]
+
+        return JsonResponse({'RESULT' : result}, status=200)
+
 class PurchaseHistoryView(View):
     @SignInDecorator
     def get(self, request):
-        purchases = PurchaseHistory.objects.select_related('purchased_product', 'purchased_product__product').filter(user=request.user).order_by('-id')
-        
+        try:
+            cursor = request.GET.get('cursor')
+            limit  = get_limit(request, settings.PURCHASE_HISTORY_PAGE_SIZE)
+
+            purchases = PurchaseHistory.objects.select_related('purchased_product', 'purchased_product__product').filter(user=request.user).order_by('-id')
+
+            if cursor:
+                purchases = purchases.filter(id__lt=int(cursor))
+
+            purchases = list(purchases[:limit + 1])
+
+        except ValueError:
+            return JsonResponse({'MESSAGE':'INVALID_CURSOR'}, status=400)
+
+        has_next  = len(purchases) > limit
+        purchases = purchases[:limit]
+
         result = [{
                 "price"        : purchase.purchased_price,
                 "date"         : purchase.purchased_time.strftime("%Y-%m-%d"),
@@ -87,24 +301,85 @@ class PurchaseHistoryView(View):
                 "product_image": purchase.purchased_product.product.thumbnail_url
         } for purchase in purchases]
 
-        return JsonResponse({"RESPONSE":result}, status=200)
+        return JsonResponse({
+            'RESPONSE'    : result,
+            'HAS_NEXT'    : has_next,
+            'NEXT_CURSOR' : str(purchases[-1].id) if has_next else None
+        }, status=200)
 
     @SignInDecorator
     def post(self, request):
         try:
-            data = json.loads(request.body)
-            print(data)
-            PurchaseHistory.objects.create(
-                user                 = request.user,
-                purchased_product    = ProductOption.objects.get(product_id=data['product_id']),
-                purchased_quantity   = 1,
-                purchased_price      = data['price'],
-                paypal_payer_id      = data['payerID'],
-                paypal_payment_id    = data['paymentID'],
-                paypal_payment_token = data['paymentToken'],
-            )
-
-            return JsonResponse({'MESSAGE':'CREATED'}, status=201)
+            data     = json.loads(request.body)
+            quantity = data.get('quantity', 1)
+            options  = ProductOption.objects.filter(product_id=parse_id(data['product_id']))
+
+            if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+                return JsonResponse({'MESSAGE':'INVALID_QUANTITY'}, status=400)
+
+            if 'option_id' in data:
+                options = options.filter(id=parse_id(data['option_id']))
+
+            option = options.get()
+
+            with transaction.atomic():
+                purchase, is_created = PurchaseHistory.objects.get_or_create(
+                    paypal_payment_id = data['paymentID'],
+                    defaults          = {
+                        'user'                 : request.user,
+                        'purchased_product'    : option,
+                        'purchased_quantity'   : quantity,
+                        'purchased_price'      : data['price'],
+                        'paypal_payer_id'      : data['payerID'],
+                        'paypal_payment_token' : data['paymentToken'],
+                    }
+                )
+
+                if is_created:
+                    reserve(option, quantity)
+                    PurchaseSummary.objects.get_or_create(user_id=request.user.id)
+                    PurchaseSummary.objects.filter(user_id=request.user.id).update(
+                        total_spent       = F('total_spent') + purchase.purchased_price * purchase.purchased_quantity,
+                        order_count       = F('order_count') + 1,
+                        last_purchased_at = purchase.purchased_time,
+                    )
+                    record_purchases([purchase.purchased_product_id])
+
+            if purchase.user_id != request.user.id:
+                return JsonResponse({'MESSAGE':'PAYMENT_ALREADY_USED'}, status=409)
+
+            return JsonResponse({
+                'MESSAGE'     : 'CREATED' if is_created else 'ALREADY_RECORDED',
+                'purchase_id' : purchase.id
+            }, status=201 if is_created else 200)
         
-        except KeyError:
+        except json.JSONDecodeError:
+            return JsonResponse({'MESSAGE':'INVALID_BODY'}, status=400)
+
+        except (KeyError, AttributeError):
             return JsonResponse({'MESSAGE':'KEY_ERROR'}, status=400)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE':'INVALID_IDS'}, status=400)
+
+        except ProductOption.DoesNotExist:
+            return JsonResponse({'MESSAGE':'OPTION_DOES_NOT_EXIST'}, status=400)
+
+        except ProductOption.MultipleObjectsReturned:
+            return JsonResponse({'MESSAGE':'OPTION_REQUIRED'}, status=400)
+
+        except OutOfStock:
+            return JsonResponse({'MESSAGE':'OUT_OF_STOCK'}, status=409)
+
+class PurchaseSummaryView(View):
+    @SignInDecorator
+    def get(self, request):
+        summary = PurchaseSummary.objects.filter(user_id=request.user.id).first() or PurchaseSummary(user_id=request.user.id)
+
+        return JsonResponse({
+            'RESULT' : {
+                'total_spent'       : summary.total_spent,
+                'order_count'       : summary.order_count,
+                'last_purchased_at' : summary.last_purchased_at,
+            }
+        }, status=200)